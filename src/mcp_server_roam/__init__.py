@@ -1,20 +1,24 @@
 """MCP server for Roam Research API integration."""
 
+import asyncio
+import importlib
 import logging
 import sys
+from typing import TYPE_CHECKING
 
 import click
 
-from .roam_api import (
-    AuthenticationError,
-    BlockNotFoundError,
-    InvalidQueryError,
-    PageNotFoundError,
-    RateLimitError,
-    RoamAPI,
-    RoamAPIError,
-)
-from .server import serve
+if TYPE_CHECKING:
+    from .roam_api import (
+        AuthenticationError,
+        BlockNotFoundError,
+        InvalidQueryError,
+        PageNotFoundError,
+        RateLimitError,
+        RoamAPI,
+        RoamAPIError,
+    )
+    from .server import serve
 
 __all__ = [
     "main",
@@ -28,16 +32,62 @@ __all__ = [
     "InvalidQueryError",
 ]
 
+# Exports resolved on first access (PEP 562) so that importing the package,
+# e.g. for `--help` or to use a single submodule, doesn't pull in the MCP
+# server, requests and numpy up front.
+_LAZY_EXPORTS = {
+    "serve": ".server",
+    "RoamAPI": ".roam_api",
+    "RoamAPIError": ".roam_api",
+    "PageNotFoundError": ".roam_api",
+    "BlockNotFoundError": ".roam_api",
+    "AuthenticationError": ".roam_api",
+    "RateLimitError": ".roam_api",
+    "InvalidQueryError": ".roam_api",
+}
+
+
+def __getattr__(name: str) -> object:
+    """Import lazily exported names on first access.
+
+    Args:
+        name: Attribute name being looked up on the package.
+
+    Returns:
+        The exported object, cached in the module namespace.
+
+    Raises:
+        AttributeError: If the name is not a package export.
+    """
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """List module attributes, including lazy exports."""
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 
 @click.command()
 @click.option("-v", "--verbose", count=True)
-def main(verbose: int) -> None:
+@click.option(
+    "--preload-embeddings/--no-preload-embeddings",
+    default=False,
+    help="Load the embedding model at startup instead of on first search.",
+)
+def main(verbose: int, preload_embeddings: bool) -> None:
     """Run the MCP Roam Server.
 
     Args:
         verbose: Verbosity level (0=WARN, 1=INFO, 2+=DEBUG).
+        preload_embeddings: Load the embedding model before serving requests.
     """
-    import asyncio
+    from . import serve
+    from .embedding import get_embedding_service
 
     logging_level = logging.WARN
     if verbose == 1:
@@ -46,6 +96,10 @@ def main(verbose: int) -> None:
         logging_level = logging.DEBUG
 
     logging.basicConfig(level=logging_level, stream=sys.stderr)
+    if preload_embeddings:
+        # The singleton loads the model once either way; preloading only moves
+        # that cost from the first semantic_search/sync_index call to startup.
+        _ = get_embedding_service().model
     asyncio.run(serve())
 
 
@@ -2,12 +2,20 @@
 
 from __future__ import annotations
 
+import hashlib
+import itertools
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from typing import TYPE_CHECKING
 
 import numpy as np
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
     from numpy.typing import NDArray
     from sentence_transformers import SentenceTransformer
 
@@ -17,6 +25,38 @@ logger = logging.getLogger(__name__)
 DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
 EMBEDDING_DIMENSIONS = 384
 DEFAULT_BATCH_SIZE = 64
+# Batch size auto-tuning: candidates are timed once per process on a synthetic
+# batch unless ROAM_EMBED_BATCH_SIZE (or an explicit batch_size) is given.
+EMBED_BATCH_SIZE_ENV = "ROAM_EMBED_BATCH_SIZE"
+BATCH_SIZE_CANDIDATES = (16, 32, 64, 128, 256)
+BATCH_SIZE_PROBE_SAMPLES = 128  # Synthetic texts encoded per timed candidate
+BATCH_SIZE_PROBE_BUDGET_SECONDS = 1.0  # Whole probe, warm-up included
+_PROBE_TEXT = "Page: Batch size probe\nContent: " + "typical block text " * 8
+# Max number of text embeddings memoized in memory (~1.5KB each at 384 dims)
+DEFAULT_CACHE_SIZE = 10_000
+# Dequantization scale for int8 embeddings: float_value ≈ int8_value * INT8_SCALE
+INT8_SCALE = 1.0 / 127.0
+
+# Inference backend configuration
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+SUPPORTED_BACKENDS = (BACKEND_TORCH, BACKEND_ONNX)
+EMBED_BACKEND_ENV = "ROAM_EMBED_BACKEND"
+# Pre-quantized (dynamic INT8) ONNX export published alongside the model
+ONNX_MODEL_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+# Model weight precision (torch backend only)
+DTYPE_FLOAT32 = "float32"
+DTYPE_BFLOAT16 = "bfloat16"
+SUPPORTED_DTYPES = (DTYPE_FLOAT32, DTYPE_BFLOAT16)
+EMBED_DTYPE_ENV = "ROAM_EMBED_DTYPE"
+
+# CPU intra-op thread count override (PyTorch defaults to physical cores)
+EMBED_THREADS_ENV = "ROAM_EMBED_THREADS"
+
+# Device override, e.g. "cpu", "cuda" or "cuda:1". When unset,
+# sentence-transformers picks CUDA, then MPS, then CPU automatically.
+EMBED_DEVICE_ENV = "ROAM_EMBED_DEVICE"
 
 
 class EmbeddingService:
@@ -25,66 +65,398 @@ class EmbeddingService:
     Uses lazy loading to defer model initialization until first use.
     """
 
-    def __init__(self, model_name: str = DEFAULT_MODEL_NAME) -> None:
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        backend: str | None = None,
+        dtype: str | None = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        num_threads: int | None = None,
+        device: str | None = None,
+        batch_size: int | None = None,
+    ) -> None:
         """Initialize the embedding service.
 
         Args:
             model_name: Name of the sentence-transformers model to use.
+            backend: Inference backend ("torch" or "onnx"). If None, reads from
+                the ROAM_EMBED_BACKEND env var, defaulting to "torch".
+            dtype: Model weight precision ("float32" or "bfloat16"). If None,
+                reads from the ROAM_EMBED_DTYPE env var, defaulting to "float32".
+            cache_size: Max number of embeddings memoized by content hash.
+                Set to 0 to disable the cache.
+            num_threads: CPU threads for PyTorch intra-op parallelism. If None,
+                reads from the ROAM_EMBED_THREADS env var, otherwise PyTorch's
+                default is kept.
+            device: Torch device to run the model on. If None, reads from the
+                ROAM_EMBED_DEVICE env var, otherwise the best available
+                accelerator is auto-detected.
+            batch_size: Default encode batch size. If None, reads from the
+                ROAM_EMBED_BATCH_SIZE env var, otherwise it is auto-tuned on
+                the first large encode.
+
+        Raises:
+            ValueError: If the backend, dtype, thread count or batch size is
+                not supported.
         """
+        resolved_backend = backend or os.getenv(EMBED_BACKEND_ENV) or BACKEND_TORCH
+        if resolved_backend not in SUPPORTED_BACKENDS:
+            raise ValueError(
+                f"Unsupported embedding backend '{resolved_backend}', "
+                f"expected one of: {', '.join(SUPPORTED_BACKENDS)}"
+            )
+        resolved_dtype = dtype or os.getenv(EMBED_DTYPE_ENV) or DTYPE_FLOAT32
+        if resolved_dtype not in SUPPORTED_DTYPES:
+            raise ValueError(
+                f"Unsupported embedding dtype '{resolved_dtype}', "
+                f"expected one of: {', '.join(SUPPORTED_DTYPES)}"
+            )
+        if resolved_dtype == DTYPE_BFLOAT16 and resolved_backend != BACKEND_TORCH:
+            raise ValueError(
+                f"Embedding dtype '{DTYPE_BFLOAT16}' requires the "
+                f"'{BACKEND_TORCH}' backend"
+            )
+        self._num_threads = _resolve_positive_int(
+            num_threads, EMBED_THREADS_ENV, "thread count"
+        )
+        self._batch_size = _resolve_positive_int(
+            batch_size, EMBED_BATCH_SIZE_ENV, "batch size"
+        )
+        self._batch_size_lock = threading.Lock()
         self._model_name = model_name
+        self._backend = resolved_backend
+        self._device = device or os.getenv(EMBED_DEVICE_ENV) or None
+        self._dtype = resolved_dtype
         self._model: SentenceTransformer | None = None
+        self._model_lock = threading.Lock()
+        self._cache_size = cache_size
+        self._cache: OrderedDict[bytes, NDArray[np.float32]] = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     @property
     def model(self) -> SentenceTransformer:
-        """Lazily load and return the embedding model."""
-        if self._model is None:
-            logger.info("Loading embedding model: %s", self._model_name)
+        """Lazily load and return the embedding model.
+
+        Loading is guarded by a lock so concurrent first calls (e.g. from
+        worker threads) load the model only once.
+        """
+        if self._model is not None:
+            return self._model
+        with self._model_lock:
+            if self._model is not None:
+                return self._model
+            logger.info(
+                "Loading embedding model: %s (backend: %s, dtype: %s)",
+                self._model_name,
+                self._backend,
+                self._dtype,
+            )
             from sentence_transformers import SentenceTransformer
 
-            self._model = SentenceTransformer(self._model_name)
-            logger.info("Embedding model loaded successfully")
-        return self._model
+            if self._num_threads is not None:
+                _set_torch_threads(self._num_threads)
+
+            if self._backend == BACKEND_ONNX:
+                # ONNX Runtime with the INT8-quantized export: fused CPU kernels
+                # and int8 GEMMs are several times faster than PyTorch on CPU.
+                model = SentenceTransformer(
+                    self._model_name,
+                    device=self._device,
+                    backend=BACKEND_ONNX,
+                    model_kwargs={"file_name": ONNX_MODEL_FILE},
+                )
+            else:
+                model = SentenceTransformer(self._model_name, device=self._device)
+                if self._dtype == DTYPE_BFLOAT16:
+                    _convert_to_bfloat16(model)
+            # Publish only the fully initialized model to lock-free readers
+            self._model = model
+            logger.info("Embedding model loaded successfully on %s", model.device)
+            return model
+
+    @property
+    def backend(self) -> str:
+        """Return the inference backend used by this service."""
+        return self._backend
+
+    @property
+    def device(self) -> str:
+        """Return the device the model runs on, loading it if needed."""
+        return str(self.model.device)
+
+    @property
+    def dtype(self) -> str:
+        """Return the model weight precision used by this service."""
+        return self._dtype
 
     @property
     def dimensions(self) -> int:
         """Return the embedding dimensions for the current model."""
         return EMBEDDING_DIMENSIONS
 
+    @property
+    def batch_size(self) -> int:
+        """Return the default batch size, auto-tuning it on first access.
+
+        The probe runs at most once per instance and is skipped when a batch
+        size was configured explicitly or via ROAM_EMBED_BATCH_SIZE.
+        """
+        if self._batch_size is not None:
+            return self._batch_size
+        with self._batch_size_lock:
+            if self._batch_size is None:
+                self._batch_size = self._probe_batch_size()
+            return self._batch_size
+
+    def _probe_batch_size(self) -> int:
+        """Time encoding a synthetic batch at each candidate batch size.
+
+        Candidates are tried in increasing order. Before each one, its cost is
+        predicted from the last measured throughput, and the probe stops if
+        that run would overrun the time budget (which includes the warm-up).
+        The fastest candidate seen wins.
+
+        Returns:
+            The batch size with the highest measured throughput, or
+            DEFAULT_BATCH_SIZE if the budget allowed fewer than two
+            candidates to be compared.
+        """
+        model = self.model
+        texts = [_PROBE_TEXT] * BATCH_SIZE_PROBE_SAMPLES
+        warm_up = texts[: BATCH_SIZE_CANDIDATES[0]]
+
+        start = time.perf_counter()
+        deadline = start + BATCH_SIZE_PROBE_BUDGET_SECONDS
+        # Warm up kernels and allocator so the first candidate isn't penalized
+        model.encode(
+            warm_up, batch_size=BATCH_SIZE_CANDIDATES[0], show_progress_bar=False
+        )
+        now = time.perf_counter()
+        # Texts/s of the latest run, used to predict the next run's cost
+        rate = len(warm_up) / max(now - start, 1e-9)
+
+        best_size = DEFAULT_BATCH_SIZE
+        best_rate = 0.0
+        measured = 0
+        for size in BATCH_SIZE_CANDIDATES:
+            if now + len(texts) / rate > deadline:
+                break
+            start = now
+            model.encode(texts, batch_size=size, show_progress_bar=False)
+            now = time.perf_counter()
+            rate = len(texts) / max(now - start, 1e-9)
+            measured += 1
+            if rate > best_rate:
+                best_size, best_rate = size, rate
+
+        if measured < 2:
+            logger.info(
+                "Batch size probe compared %d candidate(s) within %.1fs; "
+                "using default batch size %d",
+                measured,
+                BATCH_SIZE_PROBE_BUDGET_SECONDS,
+                DEFAULT_BATCH_SIZE,
+            )
+            return DEFAULT_BATCH_SIZE
+        logger.info(
+            "Auto-tuned embedding batch size: %d (%.0f texts/s)",
+            best_size,
+            best_rate,
+        )
+        return best_size
+
     def embed_texts(
-        self, texts: list[str], batch_size: int = DEFAULT_BATCH_SIZE
+        self, texts: Iterable[str], batch_size: int | None = None
     ) -> NDArray[np.float32]:
-        """Generate embeddings for a list of texts.
+        """Generate L2-normalized embeddings for a list of texts.
+
+        Vectors have unit length, so cosine similarity is a plain dot product
+        (and the vector store's L2-to-cosine conversion holds for any model).
+        Embeddings are memoized in an LRU cache keyed by a hash of the text,
+        so only texts not seen recently are run through the model.
 
         Args:
-            texts: List of text strings to embed.
-            batch_size: Number of texts to process per batch.
+            texts: Text strings to embed. Non-list iterables are materialized;
+                use embed_texts_streaming() to bound memory on large inputs.
+            batch_size: Number of texts to process per batch. Defaults to the
+                service's configured or auto-tuned batch size.
 
         Returns:
             Array of embeddings with shape (len(texts), dimensions).
         """
+        if not isinstance(texts, list):
+            texts = list(texts)
         if not texts:
             return np.array([], dtype=np.float32).reshape(0, EMBEDDING_DIMENSIONS)
 
+        # Look up cached vectors by content hash; identical texts within the
+        # call are encoded once and fanned out to every position.
+        hits: list[tuple[int, NDArray[np.float32]]] = []
+        misses: OrderedDict[bytes, list[int]] = OrderedDict()
+        with self._cache_lock:
+            for i, text in enumerate(texts):
+                key = _content_key(text)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    hits.append((i, cached))
+                else:
+                    misses.setdefault(key, []).append(i)
+
+        if not hits and len(misses) == len(texts):
+            embeddings = self._encode(texts, batch_size)
+            self._cache_embeddings(misses.keys(), embeddings)
+            return embeddings
+
+        logger.debug("Embedding cache hits: %d of %d", len(hits), len(texts))
+        result = np.empty((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+        for i, cached in hits:
+            result[i] = cached
+        if misses:
+            miss_texts = [texts[positions[0]] for positions in misses.values()]
+            embeddings = self._encode(miss_texts, batch_size)
+            for row, positions in zip(embeddings, misses.values(), strict=True):
+                result[positions] = row
+            self._cache_embeddings(misses.keys(), embeddings)
+        return result
+
+    def _encode(self, texts: list[str], batch_size: int | None) -> NDArray[np.float32]:
+        """Run the model over texts, bypassing the embedding cache.
+
+        Args:
+            texts: Non-empty list of text strings to embed.
+            batch_size: Number of texts to process per batch, or None for the
+                service default.
+
+        Returns:
+            Array of embeddings with shape (len(texts), dimensions).
+        """
+        if batch_size is None:
+            # Batch size is irrelevant when everything fits in the smallest
+            # batch, so don't pay for the auto-tuning probe yet.
+            if len(texts) <= BATCH_SIZE_CANDIDATES[0] and self._batch_size is None:
+                batch_size = DEFAULT_BATCH_SIZE
+            else:
+                batch_size = self.batch_size
         logger.debug("Embedding %d texts with batch size %d", len(texts), batch_size)
+        # encode() reuses the tokenizer cached on the model, length-sorts the
+        # inputs so each batch pads to similar lengths (restoring input order
+        # afterwards), and stacks the batches into a single float32 array, so
+        # callers should not pre-sort and we avoid a second copy here.
         embeddings = self.model.encode(
             texts,
             batch_size=batch_size,
             show_progress_bar=False,
             convert_to_numpy=True,
+            normalize_embeddings=True,
         )
-        return embeddings.astype(np.float32)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def _cache_embeddings(
+        self, keys: Iterable[bytes], embeddings: NDArray[np.float32]
+    ) -> None:
+        """Store freshly computed embeddings, evicting least recently used.
+
+        Args:
+            keys: Content hashes, aligned with the rows of embeddings.
+            embeddings: Embeddings to memoize.
+        """
+        if self._cache_size <= 0:
+            return
+        with self._cache_lock:
+            for key, row in zip(keys, embeddings, strict=True):
+                # Copy so the cache neither pins the caller's batch array nor
+                # sees later in-place modifications to it.
+                self._cache[key] = row.copy()
+                self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def embed_texts_streaming(
+        self, texts: Iterable[str], batch_size: int | None = None
+    ) -> Iterator[NDArray[np.float32]]:
+        """Lazily embed texts one batch at a time.
+
+        Only batch_size strings and their vectors are held at once, so callers
+        that write each batch out (e.g. to the vector store) keep peak memory
+        flat regardless of input size.
+
+        Args:
+            texts: Text strings to embed; consumed incrementally.
+            batch_size: Number of texts to process per batch. Defaults to the
+                service's configured or auto-tuned batch size; inputs that fit
+                in one DEFAULT_BATCH_SIZE batch don't trigger the probe.
+
+        Yields:
+            Arrays of embeddings with shape (batch length, dimensions).
+        """
+        iterator: Iterator[str] = iter(texts)
+        if not batch_size and self._batch_size is None:
+            # Peek one past a default batch: short inputs are a single encode,
+            # where tuning would cost more than it could save
+            head = list(itertools.islice(iterator, DEFAULT_BATCH_SIZE + 1))
+            if len(head) <= DEFAULT_BATCH_SIZE:
+                if head:
+                    yield self.embed_texts(head, batch_size=DEFAULT_BATCH_SIZE)
+                return
+            iterator = itertools.chain(head, iterator)
+        size = batch_size or self.batch_size
+        while chunk := list(itertools.islice(iterator, size)):
+            yield self.embed_texts(chunk, batch_size=size)
+
+    def embed_texts_int8(
+        self, texts: Iterable[str], batch_size: int | None = None
+    ) -> NDArray[np.int8]:
+        """Generate int8-quantized embeddings for a list of texts.
+
+        Normalized components lie in [-1, 1] and are mapped symmetrically to
+        [-127, 127], a quarter of the float32 footprint. Multiply by
+        INT8_SCALE to dequantize. Dot products between quantized vectors
+        should accumulate in np.int32 to avoid overflow (and to hit
+        VNNI-style int8 kernels).
+
+        Args:
+            texts: Text strings to embed.
+            batch_size: Number of texts to process per batch. Defaults to the
+                service's configured or auto-tuned batch size.
+
+        Returns:
+            Array of int8 embeddings with shape (len(texts), dimensions).
+        """
+        embeddings = self.embed_texts(texts, batch_size=batch_size)
+        quantized = np.rint(embeddings * 127.0)
+        np.clip(quantized, -127, 127, out=quantized)
+        return quantized.astype(np.int8)
 
     def embed_single(self, text: str) -> NDArray[np.float32]:
         """Generate embedding for a single text.
 
-        Args:
-            text: Text string to embed.
+        Search queries arrive one at a time, so this skips embed_texts'
+        batching and returns a standalone 1-D array rather than a view that
+        keeps a (1, dimensions) batch array alive.
 
         Returns:
-            Embedding array with shape (dimensions,).
+            Contiguous embedding array with shape (dimensions,).
         """
-        embeddings = self.embed_texts([text])
-        return embeddings[0]
+        key = _content_key(text)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            return cached.copy()
+
+        embedding = np.ascontiguousarray(
+            self.model.encode(
+                text,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            ),
+            dtype=np.float32,
+        )
+        self._cache_embeddings((key,), embedding[np.newaxis])
+        return embedding
 
     @staticmethod
     def format_block_for_embedding(
@@ -105,18 +477,95 @@ class EmbeddingService:
         Returns:
             Formatted text string for embedding.
         """
-        parts = []
-
+        # One f-string per combination avoids building and joining a parts list
+        if page_title and parent_chain:
+            path = " > ".join(parent_chain)
+            return f"Page: {page_title}\nPath: {path}\nContent: {content}"
         if page_title:
-            parts.append(f"Page: {page_title}")
-
+            return f"Page: {page_title}\nContent: {content}"
         if parent_chain:
             path = " > ".join(parent_chain)
-            parts.append(f"Path: {path}")
+            return f"Path: {path}\nContent: {content}"
+        return f"Content: {content}"
+
+
+def _resolve_positive_int(value: int | None, env_var: str, label: str) -> int | None:
+    """Resolve an optional positive integer setting from an argument or env var.
+
+    Args:
+        value: Explicitly passed value, which takes precedence.
+        env_var: Environment variable consulted when value is None.
+        label: Human-readable setting name for error messages.
+
+    Returns:
+        The configured value, or None if neither source sets it.
+
+    Raises:
+        ValueError: If the value is not a positive integer.
+    """
+    if value is None and (env_value := os.getenv(env_var)):
+        try:
+            value = int(env_value)
+        except ValueError:
+            raise ValueError(
+                f"Invalid {env_var} '{env_value}', expected a positive integer"
+            ) from None
+    if value is not None and value < 1:
+        raise ValueError(f"Embedding {label} must be positive, got {value}")
+    return value
+
+
+def _content_key(text: str) -> bytes:
+    """Return the embedding cache key for a text.
+
+    Args:
+        text: Text string to hash.
+
+    Returns:
+        128-bit BLAKE2b digest of the UTF-8 encoded text.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _set_torch_threads(num_threads: int) -> None:
+    """Set PyTorch's intra-op thread count for CPU inference.
+
+    Inter-op threads are left alone: torch only allows setting them once,
+    before any parallel work has run in the process.
+
+    Args:
+        num_threads: Number of intra-op threads.
+    """
+    import torch
+
+    torch.set_num_threads(num_threads)
+    logger.info("Embedding intra-op threads: %d", torch.get_num_threads())
+
+
+def _convert_to_bfloat16(model: SentenceTransformer) -> None:
+    """Cast model weights to bfloat16 while pooling in float32.
+
+    The transformer runs in bfloat16, halving memory traffic. Token
+    embeddings are upcast before the Pooling module so mean-pooling and
+    normalization accumulate in float32.
+
+    Args:
+        model: Loaded SentenceTransformer to convert in place.
+    """
+    import torch
+    from sentence_transformers.models import Pooling
+
+    model.to(dtype=torch.bfloat16)
 
-        parts.append(f"Content: {content}")
+    def _upcast_token_embeddings(
+        module: torch.nn.Module, args: tuple[dict[str, torch.Tensor]]
+    ) -> None:
+        features = args[0]
+        features["token_embeddings"] = features["token_embeddings"].float()
 
-        return "\n".join(parts)
+    for module in model:
+        if isinstance(module, Pooling):
+            module.register_forward_pre_hook(_upcast_token_embeddings)
 
 
 # Singleton instance
@@ -1,16 +1,26 @@
 """Interface to the Roam Research API."""
 
 import functools
+import importlib
+import json
 import logging
 import os
+import random
 import re
+import threading
 import time
-from collections.abc import Callable
-from datetime import datetime, timedelta
+from array import array
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+from types import ModuleType
 from typing import Any, TypeVar
+from urllib.parse import urlsplit
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +30,7 @@ T = TypeVar("T")
 # Retry configuration constants
 MAX_RETRIES = 3
 INITIAL_BACKOFF_SECONDS = 1.0
-BACKOFF_MULTIPLIER = 2.0
+BACKOFF_MULTIPLIER = 3.0  # Jitter window grows up to this factor per retry
 MAX_BACKOFF_SECONDS = 16.0
 
 # API configuration constants
@@ -28,6 +38,23 @@ DEFAULT_MAX_REFERENCES = 20
 REQUEST_TIMEOUT_SECONDS = 30
 RATE_LIMIT_RETRIES = 3
 RATE_LIMIT_INITIAL_BACKOFF = 10.0  # Roam rate limit is 50 req/min, so wait longer
+SANITIZE_CACHE_SIZE = 2048  # Distinct sanitized inputs (titles, UIDs) memoized
+DAILY_TITLE_CACHE_SIZE = 256  # Rendered (day, format) daily note titles memoized
+HTTP_POOL_CONNECTIONS = 4  # Distinct hosts with pooled keep-alive connections
+HTTP_POOL_MAXSIZE = 4  # Idle keep-alive connections kept per host; calls are sequential
+PULL_CACHE_TTL_SECONDS = 60.0  # Lifetime of a cached pull result
+PULL_CACHE_SIZE = 256  # Max cached pull results before evicting the oldest
+QUERY_CACHE_TTL_SECONDS = 60.0  # Lifetime of a cached read-only query result
+QUERY_CACHE_SIZE = 256  # Max cached query results before evicting the oldest
+# iter_blocks_for_sync sizes its edit-time windows from the graph's actual
+# edit-time range, so a sweep is at most SYNC_MAX_WINDOWS queries (plus one
+# for the range) regardless of graph age, well under the 50 req/min limit
+SYNC_MAX_WINDOWS = 20  # Max window queries per full-sync sweep
+SYNC_MIN_WINDOW_MS = 24 * 60 * 60 * 1000  # 1 day; young graphs use fewer windows
+PARENT_CHAIN_CACHE_SIZE = 4096  # Max memoized parent chains before evicting oldest
+PAGE_UID_CACHE_SIZE = 256  # Max memoized page title -> UID lookups
+MAX_REDIRECTS = 3  # Peer redirects followed per call before giving up
+ERROR_BODY_EXCERPT_CHARS = 512  # Error response body kept for logs and messages
 
 # Date format constants for daily notes
 # These are the common formats used by Roam Research for daily note page titles
@@ -56,6 +83,136 @@ DAILY_NOTE_FORMATS = (
 # Default date format when auto-detection fails
 DEFAULT_DATE_FORMAT = DATE_FORMAT_US_DASH
 
+# Null bytes plus patterns that indicate query injection attempts (unusual in
+# normal page titles/UIDs). Fused into one alternation so validating an input
+# is a single scan.
+_SUSPICIOUS_PATTERN_RE = re.compile(
+    r"\x00"  # Null byte
+    r"|\[:find"  # Datalog find clause
+    r"|\[:where"  # Datalog where clause
+    r"|\[\?[a-z]",  # Logic variables (e.g., [?e, [?b)
+    re.IGNORECASE,
+)
+
+# Datalog query and lookup-ref templates. Every placeholder must be filled
+# with a value that went through _sanitize_query_input, so keeping the
+# templates together makes each interpolation point easy to audit.
+_QUERY_REFERENCES_TO_PAGE = """[:find ?block-uid ?block-string
+ :where
+ [?b :block/uid ?block-uid]
+ [?b :block/string ?block-string]
+ [(clojure.string/includes? ?block-string "[[{title}]]")]]"""
+# Batched backlinks: needles ("[[title]]") are bound as a collection input,
+# so titles need no sanitizing and each row says which needle it matched
+_QUERY_REFERENCES_TO_PAGES = """[:find ?needle ?block-uid ?block-string
+ :in $ [?needle ...]
+ :where
+ [?b :block/uid ?block-uid]
+ [?b :block/string ?block-string]
+ [(clojure.string/includes? ?block-string ?needle)]]"""
+_QUERY_SEARCH_BLOCKS = """[:find ?uid ?string ?page-title
+ :where
+ [?b :block/uid ?uid]
+ [?b :block/string ?string]
+ [(clojure.string/includes? ?string "{text}")]
+ [?b :block/page ?page]
+ [?page :node/title ?page-title]]"""
+_QUERY_SEARCH_BLOCKS_IN_PAGE = """[:find ?uid ?string ?page-title
+ :where
+ [?b :block/uid ?uid]
+ [?b :block/string ?string]
+ [(clojure.string/includes? ?string "{text}")]
+ [?b :block/page ?page]
+ [?page :node/title ?page-title]
+ [(= ?page-title "{page}")]]"""
+# Which of several titles exist, with the candidates bound as a collection
+_QUERY_EXISTING_TITLES = """[:find ?title
+ :in $ [?title ...]
+ :where
+ [?e :node/title ?title]]"""
+# Internally generated values (today's date, UIDs returned by earlier
+# queries) are bound as inputs, so they need no sanitizing or escaping
+_QUERY_PAGE_UID_BY_TITLE = (
+    "[:find ?uid :in $ ?title :where [?e :node/title ?title] [?e :block/uid ?uid]]"
+)
+_QUERY_CHILDREN_OF_PARENT = """[:find ?sib-uid ?sib-string ?sib-order
+ :in $ ?parent-uid
+ :where
+ [?parent :block/uid ?parent-uid]
+ [?parent :block/children ?sib]
+ [?sib :block/uid ?sib-uid]
+ [?sib :block/string ?sib-string]
+ [?sib :block/order ?sib-order]]"""
+# Sync queries. The modified-since variants bind the timestamp as a query
+# input (:in $ ?since) so the query text is identical on every call. Full
+# syncs drop empty blocks in Datalog so they never cross the wire; the
+# modified-since variants keep them so a block cleared since the last sync
+# still replaces its stale index entry.
+_QUERY_SYNC_BLOCKS = """[:find ?uid ?string ?edit-time ?page-uid ?page-title
+ :where
+ [?b :block/uid ?uid]
+ [?b :block/string ?string]
+ [(not= ?string "")]
+ [?b :edit/time ?edit-time]
+ [?b :block/page ?page]
+ [?page :block/uid ?page-uid]
+ [?page :node/title ?page-title]]"""
+_SYNC_SINCE_TEMPLATE = """[:find ?uid ?string ?edit-time ?page-uid ?page-title
+ :in $ ?since
+ :where
+ [?b :block/uid ?uid]
+ [?b :block/string ?string]
+ [?b :edit/time ?edit-time]
+ [({op} ?edit-time ?since)]
+ [?b :block/page ?page]
+ [?page :block/uid ?page-uid]
+ [?page :node/title ?page-title]]"""
+_QUERY_SYNC_BLOCKS_SINCE = _SYNC_SINCE_TEMPLATE.format(op=">")
+_QUERY_SYNC_BLOCKS_SINCE_INCLUSIVE = _SYNC_SINCE_TEMPLATE.format(op=">=")
+_QUERY_SYNC_BLOCKS_BETWEEN = """[:find ?uid ?string ?edit-time ?page-uid ?page-title
+ :in $ ?start ?end
+ :where
+ [?b :block/uid ?uid]
+ [?b :block/string ?string]
+ [(not= ?string "")]
+ [?b :edit/time ?edit-time]
+ [(>= ?edit-time ?start)]
+ [(< ?edit-time ?end)]
+ [?b :block/page ?page]
+ [?page :block/uid ?page-uid]
+ [?page :node/title ?page-title]]"""
+_QUERY_SYNC_EDIT_TIME_RANGE = """[:find (min ?edit-time) (max ?edit-time)
+ :where
+ [?b :block/string _]
+ [?b :edit/time ?edit-time]]"""
+# Ancestors of every block in the bound UID collection, with sibling order
+# Uses Roam's :block/parents attribute which contains all ancestors
+_QUERY_PARENT_CHAINS = """[:find ?uid ?parent-string ?parent-order
+ :in $ [?uid ...]
+ :where
+ [?b :block/uid ?uid]
+ [?b :block/parents ?parent]
+ [?parent :block/string ?parent-string]
+ [?parent :block/order ?parent-order]]"""
+_LOOKUP_BLOCK_BY_UID = '[:block/uid "{uid}"]'
+_LOOKUP_PAGE_BY_TITLE = '[:node/title "{title}"]'
+# Recursive pull pattern: "..." means "pull this pattern again for children"
+_PULL_PAGE_TREE = "[* {:block/children ...}]"
+# Many pages by title in one round-trip, each row tagged with its title
+_QUERY_PULL_PAGES_BY_TITLE = f"""[:find ?title (pull ?e {_PULL_PAGE_TREE})
+ :in $ [?title ...]
+ :where
+ [?e :node/title ?title]]"""
+
+# Markdown bullet prefix (indent plus "- ") per outline depth, so
+# process_blocks reuses the same string objects instead of building one for
+# every block. Deeper levels (rare) fall back to building the string.
+_INDENT_CACHE_DEPTH = 32
+_BULLETS = tuple("  " * depth + "- " for depth in range(_INDENT_CACHE_DEPTH))
+
+# Captures the title inside each [[Page Name]] link in a block string
+_PAGE_LINK_RE = re.compile(r"\[\[([^\]]+)\]\]")
+
 
 def retry_with_backoff(
     max_retries: int = MAX_RETRIES,
@@ -67,58 +224,73 @@ def retry_with_backoff(
         requests.exceptions.Timeout,
     ),
 ) -> Callable[[Callable[..., T]], Callable[..., T]]:
-    """Decorator for retrying functions with exponential backoff.
+    """Decorator for retrying functions with decorrelated-jitter backoff.
+
+    Each sleep is drawn uniformly between initial_backoff and backoff_multiplier
+    times the previous sleep, capped at max_backoff. The randomness keeps
+    concurrent callers from retrying in lockstep.
 
     Args:
         max_retries: Maximum number of retry attempts.
-        initial_backoff: Initial backoff time in seconds.
-        backoff_multiplier: Multiplier for each subsequent backoff.
+        initial_backoff: Minimum (and first base) backoff time in seconds.
+        backoff_multiplier: Upper bound of each sleep relative to the last one.
         max_backoff: Maximum backoff time in seconds.
         retryable_exceptions: Tuple of exception types that trigger a retry.
 
     Returns:
         Decorated function with retry logic.
     """
+    total_attempts = max_retries + 1
 
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
-            last_exception: Exception | None = None
-            backoff = initial_backoff
+            # Fast path: most calls succeed first time and never enter the loop
+            try:
+                return func(*args, **kwargs)
+            except retryable_exceptions as e:
+                error = e
 
-            for attempt in range(max_retries + 1):
+            backoff = initial_backoff
+            for attempt in range(1, total_attempts):
+                backoff = min(
+                    max_backoff,
+                    random.uniform(initial_backoff, backoff * backoff_multiplier),
+                )
+                logger.warning(
+                    "Attempt %d/%d failed: %s. Retrying in %.1fs...",
+                    attempt,
+                    total_attempts,
+                    error,
+                    backoff,
+                )
+                time.sleep(backoff)
                 try:
                     return func(*args, **kwargs)
                 except retryable_exceptions as e:
-                    last_exception = e
-                    if attempt < max_retries:
-                        logger.warning(
-                            "Attempt %d/%d failed: %s. Retrying in %.1fs...",
-                            attempt + 1,
-                            max_retries + 1,
-                            e,
-                            backoff,
-                        )
-                        time.sleep(backoff)
-                        backoff = min(backoff * backoff_multiplier, max_backoff)
-                    else:
-                        logger.error(
-                            "All %d attempts failed. Last error: %s",
-                            max_retries + 1,
-                            e,
-                        )
+                    error = e
 
-            # If we get here, all retries failed
-            if last_exception:
-                raise last_exception
-            # This should never happen, but satisfies type checker
-            raise RuntimeError("Retry logic failed unexpectedly")  # pragma: no cover
+            logger.error(
+                "All %d attempts failed. Last error: %s", total_attempts, error
+            )
+            raise error
 
         return wrapper
 
     return decorator
 
 
+# Ordinal suffix indexed by day of month (slot 0 unused)
+_ORDINAL_SUFFIX = tuple(
+    (
+        "st"
+        if day in (1, 21, 31)
+        else "nd" if day in (2, 22) else "rd" if day in (3, 23) else "th"
+    )
+    for day in range(32)
+)
+
+
 def ordinal_suffix(day: int) -> str:
     """Return ordinal suffix (st, nd, rd, th) for a day number.
 
@@ -128,17 +300,40 @@ def ordinal_suffix(day: int) -> str:
     Returns:
         The ordinal suffix string ('st', 'nd', 'rd', or 'th').
     """
-    if day in (1, 21, 31):
-        return "st"
-    if day in (2, 22):
-        return "nd"
-    if day in (3, 23):
-        return "rd"
-    return "th"
+    return _ORDINAL_SUFFIX[day]
 
 
-# Load environment variables from .env file
-load_dotenv()
+@functools.lru_cache(maxsize=DAILY_TITLE_CACHE_SIZE)
+def _format_daily_title(day: date, date_format: str) -> str:
+    """Render a daily note page title for a date, memoizing the result.
+
+    Format detection and daily context render the same recent days over and
+    over, so repeats skip strftime. Pass a date rather than a datetime so
+    calls at different times of day share a cache entry.
+
+    Args:
+        day: The date to render.
+        date_format: A strftime pattern, or DATE_FORMAT_ORDINAL.
+
+    Returns:
+        The daily note title, e.g. "June 13th, 2025".
+    """
+    if date_format == DATE_FORMAT_ORDINAL:
+        return day.strftime(f"%B %d{_ORDINAL_SUFFIX[day.day]}, %Y")
+    return day.strftime(date_format)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_env() -> None:
+    """Load environment variables from the .env file exactly once.
+
+    load_dotenv() re-opens and re-parses the file on every call, so modules
+    that need the .env values share this one-shot loader instead.
+    """
+    load_dotenv()
+
+
+_load_env()
 
 
 # Custom Exception Classes
@@ -163,13 +358,168 @@ class AuthenticationError(RoamAPIError):
 
 
 class RateLimitError(RoamAPIError):
-    """Raised when the Roam API rate limit is exceeded."""
+    """Raised when the Roam API rate limit is exceeded.
+
+    Attributes:
+        retry_after: Seconds the server asked us to wait (from the Retry-After
+            header), or None if it didn't say.
+    """
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        """Initialize the error.
+
+        Args:
+            message: Error message.
+            retry_after: Seconds to wait before retrying, if known.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _import_orjson() -> ModuleType | None:
+    """Import orjson if the optional `fast-json` extra is installed.
+
+    Returns:
+        The orjson module, or None to fall back to the stdlib json codec.
+    """
+    try:
+        return importlib.import_module("orjson")
+    except ImportError:
+        return None
+
+
+# orjson encodes and decodes several times faster than the stdlib json used by
+# requests, which matters for large recursive page pulls
+_orjson = _import_orjson()
+
+
+def _decode_json(resp: requests.Response) -> Any:
+    """Decode a JSON response body, using orjson when it is installed.
+
+    Args:
+        resp: The HTTP response.
+
+    Returns:
+        The decoded JSON value.
+    """
+    if _orjson is not None:
+        return _orjson.loads(resp.content)
+    return resp.json()
+
+
+def _parse_redirect_location(location: str) -> str | None:
+    """Build the peer base URL from a Roam API redirect Location header.
+
+    Args:
+        location: Raw Location header, e.g.
+            "https://peer-123.api.roamresearch.com:8765/api/graph/x/q".
+
+    Returns:
+        The peer base URL, e.g. "https://peer-123.api.roamresearch.com:8765",
+        or None if the location is not an https URL on a peer-N host with an
+        explicit port.
+    """
+    parts = urlsplit(location)
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    peer = (parts.hostname or "").split(".", 1)[0]
+    if (
+        parts.scheme != "https"
+        or port is None
+        or not peer.startswith("peer-")
+        or not peer[5:].isdigit()
+    ):
+        return None
+    return f"https://{peer}.api.roamresearch.com:{port}"
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given in seconds.
+
+    Args:
+        value: Raw header value, or None if absent.
+
+    Returns:
+        Seconds to wait, or None if the header is missing, negative, or not a
+        number (e.g. the HTTP-date form).
+    """
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
 
 
 class InvalidQueryError(RoamAPIError):
     """Raised when a query or request to the Roam API is invalid."""
 
 
+@functools.lru_cache(maxsize=SANITIZE_CACHE_SIZE)
+def _sanitize_cached(value: str) -> str:
+    """Validate and escape a string for Datalog, memoizing the result.
+
+    Page titles, daily note dates and UIDs recur across calls, so repeats skip
+    the regex scan. Rejected inputs raise and are therefore never cached.
+
+    Args:
+        value: The string value to sanitize.
+
+    Returns:
+        Sanitized string safe for use in Datalog queries.
+
+    Raises:
+        InvalidQueryError: If input contains suspicious patterns or null bytes.
+    """
+    # Check for null bytes and patterns that might indicate query injection
+    match = _SUSPICIOUS_PATTERN_RE.search(value)
+    if match:
+        if match.group(0) == "\x00":
+            raise InvalidQueryError("Input contains null bytes")
+        raise InvalidQueryError(f"Input contains suspicious pattern: {match.group(0)}")
+
+    # Escape double quotes by doubling them (EDN/Datalog standard); most
+    # inputs have none, so skip building a copy of the string.
+    if '"' not in value:
+        return value
+    return value.replace('"', '""')
+
+
+@dataclass(slots=True, frozen=True)
+class BlockRecord:
+    """A block fetched for vector index sync.
+
+    Slotted alternative to the sync block dicts: no per-instance __dict__,
+    so a large sync payload takes a fraction of the memory.
+
+    Attributes:
+        uid: Block UID.
+        content: Block text content.
+        edit_time: Edit timestamp in milliseconds.
+        page_uid: UID of the containing page.
+        page_title: Title of the containing page.
+    """
+
+    uid: str
+    content: str
+    edit_time: int
+    page_uid: str
+    page_title: str
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the record in the get_blocks_for_sync dict format."""
+        return {
+            "uid": self.uid,
+            "content": self.content,
+            "edit_time": self.edit_time,
+            "page_uid": self.page_uid,
+            "page_title": self.page_title,
+        }
+
+
 class RoamAPI:
     """Client for interacting with the Roam Research API."""
 
@@ -201,26 +551,36 @@ class RoamAPI:
             msg = f"Input must be a string, got {type(value).__name__}"
             raise InvalidQueryError(msg)
 
-        # Check for null bytes and other control characters that could cause issues
-        if "\x00" in value:
-            raise InvalidQueryError("Input contains null bytes")
+        # Fast path for typical UIDs and titles: quotes are the only thing to
+        # escape and every suspicious pattern is a null byte or starts with
+        # "[", so inputs with none of the three are already safe. Three
+        # C-level substring scans, no copy, regex or cache entry.
+        if '"' not in value and "\x00" not in value and "[" not in value:
+            return value
 
-        # Check for suspicious patterns that might indicate query injection attempts.
-        # These patterns are unusual in normal page titles/UIDs.
-        suspicious_patterns = [
-            r"\[:find",  # Datalog find clause
-            r"\[:where",  # Datalog where clause
-            r"\[\?[a-z]",  # Logic variables (e.g., [?e, [?b)
-        ]
+        return _sanitize_cached(value)
 
-        for pattern in suspicious_patterns:
-            if re.search(pattern, value, re.IGNORECASE):
-                raise InvalidQueryError(f"Input contains suspicious pattern: {pattern}")
+    @staticmethod
+    def _sanitize_uid(value: str) -> str:
+        """Sanitize a block or page UID before interpolating it into Datalog.
+
+        Roam UIDs are short ASCII strings that are almost always purely
+        alphanumeric, which two C-level checks confirm without copying the
+        string. Anything else goes through _sanitize_query_input.
+
+        Args:
+            value: The UID to sanitize
 
-        # Escape double quotes by doubling them (EDN/Datalog standard)
-        sanitized = value.replace('"', '""')
+        Returns:
+            Sanitized UID safe for use in Datalog queries
 
-        return sanitized
+        Raises:
+            InvalidQueryError: If input is not a string or contains suspicious
+                patterns.
+        """
+        if isinstance(value, str) and value.isascii() and value.isalnum():
+            return value
+        return RoamAPI._sanitize_query_input(value)
 
     def __init__(
         self, api_token: str | None = None, graph_name: str | None = None
@@ -249,10 +609,65 @@ class RoamAPI:
         # These are guaranteed non-None after validation above
         self.api_token: str = resolved_token
         self.graph_name: str = resolved_graph
+        # The token never changes, so mask it once for per-request debug logs
+        self._masked_token = self._mask_token(resolved_token)
+        # Endpoint paths are fixed for the client's lifetime
+        self._query_path = f"/api/graph/{resolved_graph}/q"
+        self._pull_path = f"/api/graph/{resolved_graph}/pull"
+        self._write_path = f"/api/graph/{resolved_graph}/write"
         self._redirect_cache: dict[str, str] = {}
+        # Monotonic time until which the server has asked us to back off.
+        # Calls from other threads wait it out instead of hitting the rate
+        # limiter again mid-backoff.
+        self._rate_limited_until = 0.0
         self._daily_note_format: str | None = None
+        # (eid, pattern) -> (expires_at, result); insertion order is age order
+        self._pull_cache: dict[tuple[str, str], tuple[float, dict[str, Any]]] = {}
+        # (query, JSON-encoded args) -> (expires_at, rows); same ordering
+        self._query_cache: dict[tuple[str, str], tuple[float, list[Any]]] = {}
+        # One lock guards both read caches
+        self._read_cache_lock = threading.Lock()
+        # Bumped whenever the graph is known to have changed; parent chains are
+        # keyed on it so stale entries are never read back
+        self._graph_version = 0
+        # (block_uid, graph_version) -> parent strings; insertion order is age
+        self._parent_chain_cache: dict[tuple[str, int], tuple[str, ...]] = {}
+        self._parent_chain_cache_lock = threading.Lock()
+        # page title -> page UID. A page keeps its UID for life, so entries
+        # survive writes and are only dropped when a write to them fails
+        self._page_uid_cache: dict[str, str] = {}
+        self._page_uid_cache_lock = threading.Lock()
+
+        # One pooled session per client so repeat calls reuse keep-alive
+        # connections instead of paying a TCP + TLS handshake each time
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE
+            ),
+        )
+        self._session.headers.update(
+            {
+                "Content-Type": "application/json; charset=utf-8",
+                "Authorization": f"Bearer {self.api_token}",
+                "x-authorization": f"Bearer {self.api_token}",
+            }
+        )
         logger.info("Initialized RoamAPI client for graph: %s", self.graph_name)
 
+    def close(self) -> None:
+        """Close pooled HTTP connections held by the client's session."""
+        self._session.close()
+
+    def __enter__(self) -> "RoamAPI":
+        """Use the client as a context manager that closes it on exit."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the client when leaving a with block."""
+        self.close()
+
     def _mask_token(self, token: str) -> str:
         """Mask a token for logging, showing first/last 4 chars if long enough.
 
@@ -273,17 +688,16 @@ class RoamAPI:
             requests.exceptions.ChunkedEncodingError,
         )
     )
-    def _make_request(
-        self, url: str, headers: dict[str, str], body: dict[str, Any]
-    ) -> requests.Response:
+    def _make_request(self, url: str, body: dict[str, Any]) -> requests.Response:
         """Make an HTTP POST request with retry logic.
 
         This is an internal method that handles the actual HTTP call with
-        automatic retries for transient network errors.
+        automatic retries for transient network errors. Auth headers come
+        from the client's shared session. The body is pre-encoded with orjson
+        when it is installed.
 
         Args:
             url: Full URL to request.
-            headers: HTTP headers.
             body: JSON body to send.
 
         Returns:
@@ -293,9 +707,15 @@ class RoamAPI:
             requests.exceptions.ConnectionError: After all retries exhausted.
             requests.exceptions.Timeout: After all retries exhausted.
         """
-        return requests.post(
+        if _orjson is not None:
+            return self._session.post(
+                url,
+                data=_orjson.dumps(body),
+                allow_redirects=False,
+                timeout=REQUEST_TIMEOUT_SECONDS,
+            )
+        return self._session.post(
             url,
-            headers=headers,
             json=body,
             allow_redirects=False,
             timeout=REQUEST_TIMEOUT_SECONDS,
@@ -304,8 +724,10 @@ class RoamAPI:
     def call(self, path: str, body: dict[str, Any]) -> requests.Response:
         """Make an API call to Roam, following redirects if necessary.
 
-        Includes automatic retry logic for rate limit errors (HTTP 429) with
-        exponential backoff.
+        Includes automatic retry logic for rate limit errors (HTTP 429). Waits
+        as long as the server's Retry-After header asks (capped), falling back
+        to decorrelated-jitter backoff when the header is absent. While one
+        call is backing off, new calls on the same client wait too.
 
         Args:
             path: API endpoint path.
@@ -324,20 +746,39 @@ class RoamAPI:
         backoff = RATE_LIMIT_INITIAL_BACKOFF
         last_rate_limit_error: RateLimitError | None = None
 
+        # Zero until the first 429, so the common path skips the clock read
+        if self._rate_limited_until:
+            cooldown = self._rate_limited_until - time.monotonic()
+            if cooldown > 0:
+                logger.debug("Waiting %.1fs for rate limit backoff to end", cooldown)
+                time.sleep(cooldown)
+
         for attempt in range(RATE_LIMIT_RETRIES + 1):
             try:
                 return self._call_once(path, body)
             except RateLimitError as e:
                 last_rate_limit_error = e
                 if attempt < RATE_LIMIT_RETRIES:
+                    if e.retry_after is not None:
+                        backoff = min(MAX_BACKOFF_SECONDS * 4, e.retry_after)
+                    else:
+                        backoff = min(
+                            MAX_BACKOFF_SECONDS * 4,
+                            random.uniform(
+                                RATE_LIMIT_INITIAL_BACKOFF,
+                                backoff * BACKOFF_MULTIPLIER,
+                            ),
+                        )
                     logger.warning(
                         "Rate limit hit (attempt %d/%d). Waiting %.1fs before retry...",
                         attempt + 1,
                         RATE_LIMIT_RETRIES + 1,
                         backoff,
                     )
+                    self._rate_limited_until = max(
+                        self._rate_limited_until, time.monotonic() + backoff
+                    )
                     time.sleep(backoff)
-                    backoff = min(backoff * BACKOFF_MULTIPLIER, MAX_BACKOFF_SECONDS * 4)
                 else:
                     logger.error(
                         "Rate limit exceeded after %d attempts", RATE_LIMIT_RETRIES + 1
@@ -363,26 +804,25 @@ class RoamAPI:
             InvalidQueryError: If redirect URL cannot be parsed.
             AuthenticationError: If authentication fails (HTTP 401).
             RateLimitError: If rate limit is exceeded (HTTP 429).
-            RoamAPIError: For other API errors.
+            RoamAPIError: For other API errors, including more than
+                MAX_REDIRECTS consecutive redirects.
         """
-        base_url = self._redirect_cache.get(
-            self.graph_name, "https://api.roamresearch.com"
-        )
-        url = base_url + path
-        headers = {
-            "Content-Type": "application/json; charset=utf-8",
-            "Authorization": f"Bearer {self.api_token}",
-            "x-authorization": f"Bearer {self.api_token}",
-        }
+        logger.debug("Request headers: Authorization: Bearer %s", self._masked_token)
 
-        logger.debug("Making POST request to: %s", url)
-        masked_token = self._mask_token(self.api_token)
-        logger.debug("Request headers: Authorization: Bearer %s", masked_token)
+        # Follow peer redirects in a bounded loop so a redirect cycle can't
+        # recurse forever
+        for _ in range(MAX_REDIRECTS + 1):
+            base_url = self._redirect_cache.get(
+                self.graph_name, "https://api.roamresearch.com"
+            )
+            url = base_url + path
+            logger.debug("Making POST request to: %s", url)
 
-        resp = self._make_request(url, headers, body)
+            resp = self._make_request(url, body)
+            if not (resp.is_redirect or resp.status_code == 307):
+                break
 
-        # Handle redirects manually to cache the new URL
-        if resp.is_redirect or resp.status_code == 307:
+            # Handle redirects manually to cache the new URL
             if "Location" not in resp.headers:
                 msg = f"Redirect without Location header: {resp.headers}"
                 raise InvalidQueryError(msg)
@@ -390,30 +830,35 @@ class RoamAPI:
             location = resp.headers["Location"]
             logger.info("Received redirect to: %s", location)
 
-            match = re.search(r"https://(peer-\d+).*?:(\d+)", location)
-            if not match:
+            redirect_url = _parse_redirect_location(location)
+            if redirect_url is None:
                 raise InvalidQueryError(f"Could not parse redirect URL: {location}")
 
-            peer, port = match.groups()
-            redirect_url = f"https://{peer}.api.roamresearch.com:{port}"
             self._redirect_cache[self.graph_name] = redirect_url
             logger.info("Cached redirect URL: %s", redirect_url)
-            return self._call_once(path, body)
+        else:
+            raise RoamAPIError(f"Too many redirects (more than {MAX_REDIRECTS})")
 
         # Handle errors
         if not resp.ok:
-            logger.error("Error response status: %s", resp.status_code)
-            logger.error("Error response body: %s", resp.text)
+            # Cap the body so a large error payload can't bloat logs or messages
+            excerpt = resp.text[:ERROR_BODY_EXCERPT_CHARS]
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error("Error response status: %s", resp.status_code)
+                logger.error("Error response body: %s", excerpt)
             if resp.status_code == 500:
-                raise RoamAPIError(f"Server error (HTTP 500): {resp.text!s}")
+                raise RoamAPIError(f"Server error (HTTP 500): {excerpt}")
             elif resp.status_code == 400:
-                raise InvalidQueryError(f"Bad request (HTTP 400): {resp.text!s}")
+                raise InvalidQueryError(f"Bad request (HTTP 400): {excerpt}")
             elif resp.status_code == 401:
                 raise AuthenticationError(
                     "Authentication error (HTTP 401): Invalid token"
                 )
             elif resp.status_code == 429:
-                raise RateLimitError(f"Rate limit exceeded (HTTP 429): {resp.text}")
+                raise RateLimitError(
+                    f"Rate limit exceeded (HTTP 429): {excerpt}",
+                    retry_after=_parse_retry_after(resp.headers.get("Retry-After")),
+                )
             else:
                 raise RoamAPIError(
                     f"Service unavailable (HTTP {resp.status_code}): "
@@ -422,12 +867,18 @@ class RoamAPI:
 
         return resp
 
-    def run_query(self, query: str, args: list[Any] | None = None) -> list[Any]:
+    def run_query(
+        self, query: str, args: list[Any] | None = None, *, cache: bool = False
+    ) -> list[Any]:
         """Run a Datalog query on the Roam graph.
 
         Args:
             query: Datalog query string.
             args: Optional arguments for the query.
+            cache: If True, serve and store the result in the read cache for
+                QUERY_CACHE_TTL_SECONDS. Cached rows are shared between
+                callers, so treat them as read-only. Meant for interactive
+                reads; sync and raw user queries always hit the API.
 
         Returns:
             Query results.
@@ -436,32 +887,69 @@ class RoamAPI:
             InvalidQueryError: If the query is malformed or invalid.
             RoamAPIError: If the API request fails.
         """
-        path = f"/api/graph/{self.graph_name}/q"
+        # Only cached reads pay for the key and the clock; uncached args can be
+        # large (sync windows, parent-chain UID lists)
+        key: tuple[str, str] | None = None
+        now = 0.0
+        if cache:
+            key = (query, json.dumps(args))
+            now = time.monotonic()
+            with self._read_cache_lock:
+                cached = self._query_cache.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+
         body: dict[str, Any] = {"query": query}
         if args is not None:
             body["args"] = args
 
-        resp = self.call(path, body)
-        result = resp.json()
-        return result.get("result", [])
+        resp = self.call(self._query_path, body)
+        rows: list[Any] = _decode_json(resp).get("result", [])
+
+        if key is not None:
+            with self._read_cache_lock:
+                self._query_cache.pop(key, None)
+                if len(self._query_cache) >= QUERY_CACHE_SIZE:
+                    del self._query_cache[next(iter(self._query_cache))]
+                self._query_cache[key] = (now + QUERY_CACHE_TTL_SECONDS, rows)
+        return rows
 
     def pull(self, eid: str, pattern: str = "[*]") -> dict[str, Any]:
         """Get an entity by its ID using a pull pattern.
 
         Args:
-            eid: The entity ID to pull.
+            eid: The entity ID to pull, or a lookup ref such as
+                '[:block/uid "abc123"]'.
             pattern: The pull pattern to use for selecting attributes.
 
         Returns:
-            The entity data matching the pull pattern.
+            The entity data matching the pull pattern, or an empty dict if
+            the entity does not exist. Results are cached for
+            PULL_CACHE_TTL_SECONDS and shared between callers, so treat them
+            as read-only.
 
         Raises:
             RoamAPIError: If the API request fails.
         """
-        path = f"/api/graph/{self.graph_name}/pull"
+        key = (eid, pattern)
+        now = time.monotonic()
+        with self._read_cache_lock:
+            cached = self._pull_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
         body = {"eid": eid, "selector": pattern}
-        resp = self.call(path, body)
-        return resp.json().get("result", {})
+        resp = self.call(self._pull_path, body)
+        result = _decode_json(resp).get("result") or {}
+
+        # Don't cache misses so a page created moments later is still found
+        if result:
+            with self._read_cache_lock:
+                self._pull_cache.pop(key, None)
+                if len(self._pull_cache) >= PULL_CACHE_SIZE:
+                    del self._pull_cache[next(iter(self._pull_cache))]
+                self._pull_cache[key] = (now + PULL_CACHE_TTL_SECONDS, result)
+        return result
 
     def get_references_to_page(
         self, page_title: str, max_results: int = DEFAULT_MAX_REFERENCES
@@ -490,24 +978,12 @@ class RoamAPI:
         # Sanitize input to prevent query injection
         sanitized_title = self._sanitize_query_input(page_title)
 
-        # Query to find blocks that contain the page reference
-        # Using clojure.string/includes? to search for the page title in block strings
-        query = f"""[:find ?block-uid ?block-string
-                     :where
-                     [?b :block/uid ?block-uid]
-                     [?b :block/string ?block-string]
-                     [(clojure.string/includes? ?block-string "[[{sanitized_title}]]")
-                     ]]"""
+        # Find blocks whose string contains the page reference
+        query = _QUERY_REFERENCES_TO_PAGE.format(title=sanitized_title)
 
         try:
-            results = self.run_query(query)
-            references = []
-
-            for result in results[:max_results]:  # Limit results
-                block_uid, block_string = result
-                references.append({"uid": block_uid, "string": block_string})
-
-            return references
+            results = self.run_query(query, cache=True)
+            return [{"uid": u, "string": s} for u, s in results[:max_results]]
         except (AuthenticationError, InvalidQueryError):
             # Re-raise critical errors that shouldn't be silently ignored
             raise
@@ -543,25 +1019,14 @@ class RoamAPI:
 
         if page_title:
             sanitized_page = self._sanitize_query_input(page_title)
-            query = f"""[:find ?uid ?string ?page-title
-                         :where
-                         [?b :block/uid ?uid]
-                         [?b :block/string ?string]
-                         [(clojure.string/includes? ?string "{sanitized_text}")]
-                         [?b :block/page ?page]
-                         [?page :node/title ?page-title]
-                         [(= ?page-title "{sanitized_page}")]]"""
+            query = _QUERY_SEARCH_BLOCKS_IN_PAGE.format(
+                text=sanitized_text, page=sanitized_page
+            )
         else:
-            query = f"""[:find ?uid ?string ?page-title
-                         :where
-                         [?b :block/uid ?uid]
-                         [?b :block/string ?string]
-                         [(clojure.string/includes? ?string "{sanitized_text}")]
-                         [?b :block/page ?page]
-                         [?page :node/title ?page-title]]"""
+            query = _QUERY_SEARCH_BLOCKS.format(text=sanitized_text)
 
         try:
-            results = self.run_query(query)
+            results = self.run_query(query, cache=True)
             return [
                 {"uid": r[0], "content": r[1], "page_title": r[2]}
                 for r in results[:limit]
@@ -586,18 +1051,14 @@ class RoamAPI:
             InvalidQueryError: If the query contains invalid patterns.
         """
         # Sanitize input to prevent query injection
-        sanitized_uid = self._sanitize_query_input(block_uid)
+        sanitized_uid = self._sanitize_uid(block_uid)
 
-        # First find the entity ID for the block
-        query = f'[:find ?e :where [?e :block/uid "{sanitized_uid}"]]'
-        results = self.run_query(query)
-
-        if not results or len(results) == 0:
+        # Pull directly through a lookup ref instead of querying for the
+        # entity ID first, saving a round trip (and a rate-limit slot)
+        block = self.pull(_LOOKUP_BLOCK_BY_UID.format(uid=sanitized_uid))
+        if not block:
             raise BlockNotFoundError(f"Block with UID '{block_uid}' not found")
-
-        # Pull the block data
-        eid = results[0][0]
-        return self.pull(eid)
+        return block
 
     def get_page(self, page_title: str) -> dict[str, Any]:
         """Get a page by its title.
@@ -615,18 +1076,14 @@ class RoamAPI:
         # Sanitize input to prevent query injection
         sanitized_title = self._sanitize_query_input(page_title)
 
-        # First find the entity ID for the page
-        query = f'[:find ?e :where [?e :node/title "{sanitized_title}"]]'
-        results = self.run_query(query)
-
-        if not results or len(results) == 0:
+        # Pull the page through a lookup ref (one round trip) with a recursive
+        # pull pattern to get all nested blocks
+        page = self.pull(
+            _LOOKUP_PAGE_BY_TITLE.format(title=sanitized_title), _PULL_PAGE_TREE
+        )
+        if not page:
             raise PageNotFoundError(f"Page with title '{page_title}' not found")
-
-        # Pull the page data with a recursive pull pattern to get all nested blocks
-        eid = results[0][0]
-        # The ... notation means "recursively pull this pattern"
-        pattern = "[* {:block/children ...}]"
-        return self.pull(eid, pattern)
+        return page
 
     def create_block(
         self,
@@ -647,45 +1104,72 @@ class RoamAPI:
         Raises:
             PageNotFoundError: If the daily notes page is not found (when neither
                 page_uid nor parent_uid provided).
-            BlockNotFoundError: If the UID for the daily page cannot be found.
             RoamAPIError: If the API request fails.
         """
+        daily_title = None
         if not page_uid and not parent_uid:
             # Default to today's Daily Notes
-            from datetime import datetime
-
-            today = datetime.now().strftime(DEFAULT_DATE_FORMAT)
-
-            # Sanitize date string to prevent query injection
-            sanitized_today = self._sanitize_query_input(today)
-
-            # Find the daily notes page
-            query = f'[:find ?e :where [?e :node/title "{sanitized_today}"]]'
-            results = self.run_query(query)
-
-            if not results or len(results) == 0:
-                raise PageNotFoundError(f"Daily Notes page for '{today}' not found")
-
-            # Get the UID
-            daily_page_query = (
-                f'[:find ?uid :where [?e :node/title "{sanitized_today}"] '
-                "[?e :block/uid ?uid]]"
-            )
-            uid_results = self.run_query(daily_page_query)
-
-            if not uid_results or len(uid_results) == 0:
-                raise BlockNotFoundError(f"Could not find UID for daily page '{today}'")
-
-            parent_uid = uid_results[0][0]
+            daily_title = datetime.now().strftime(DEFAULT_DATE_FORMAT)
+            parent_uid = self._get_page_uid(daily_title)
+            if parent_uid is None:
+                raise PageNotFoundError(
+                    f"Daily Notes page for '{daily_title}' not found"
+                )
 
-        path = f"/api/graph/{self.graph_name}/write"
         body = {
             "action": "create-block",
             "location": {"parent-uid": parent_uid or page_uid, "order": 0},
             "block": {"string": content},
         }
-        resp = self.call(path, body)
-        return resp.json()
+        try:
+            resp = self.call(self._write_path, body)
+        except RoamAPIError:
+            # The page may have been deleted since its UID was cached
+            if daily_title is not None:
+                with self._page_uid_cache_lock:
+                    self._page_uid_cache.pop(daily_title, None)
+            raise
+        # The write changes page/block trees, so cached reads are now stale
+        with self._read_cache_lock:
+            self._pull_cache.clear()
+            self._query_cache.clear()
+        self._bump_graph_version()
+        return _decode_json(resp)
+
+    def _get_page_uid(self, page_title: str) -> str | None:
+        """Resolve a page title to its UID, memoizing hits.
+
+        Args:
+            page_title: Title of the page.
+
+        Returns:
+            The page UID, or None if no page has that title. Misses are not
+            cached so a page created moments later is still found.
+
+        Raises:
+            RoamAPIError: If the API request fails.
+        """
+        with self._page_uid_cache_lock:
+            cached = self._page_uid_cache.get(page_title)
+        if cached is not None:
+            return cached
+
+        results = self.run_query(_QUERY_PAGE_UID_BY_TITLE, args=[page_title])
+        if not results:
+            return None
+
+        page_uid: str = results[0][0]
+        with self._page_uid_cache_lock:
+            if len(self._page_uid_cache) >= PAGE_UID_CACHE_SIZE:
+                del self._page_uid_cache[next(iter(self._page_uid_cache))]
+            self._page_uid_cache[page_title] = page_uid
+        return page_uid
+
+    def _bump_graph_version(self) -> None:
+        """Mark the graph as changed so memoized parent chains are not reused."""
+        with self._parent_chain_cache_lock:
+            self._graph_version += 1
+            self._parent_chain_cache.clear()
 
     def find_daily_note_format(self) -> str:
         """Find the correct date format for daily notes by testing common formats.
@@ -701,41 +1185,78 @@ class RoamAPI:
         if self._daily_note_format is not None:
             return self._daily_note_format
 
-        today = datetime.now()
+        today = datetime.now().date()
 
+        # Render today's title in every candidate format. Insertion order keeps
+        # DAILY_NOTE_FORMATS priority, and the first format wins if two formats
+        # render the same title.
+        candidates: dict[str, str] = {}
         for fmt in DAILY_NOTE_FORMATS:
-            try:
-                if fmt == DATE_FORMAT_ORDINAL:
-                    date_str = today.strftime(f"%B %d{ordinal_suffix(today.day)}, %Y")
-                else:
-                    date_str = today.strftime(fmt)
-
-                logger.info("Trying daily note format: %s", date_str)
-
-                # Sanitize date string to prevent query injection
-                sanitized_date = self._sanitize_query_input(date_str)
-
-                # Try to find this page
-                query = f'[:find ?e :where [?e :node/title "{sanitized_date}"]]'
-                results = self.run_query(query)
+            candidates.setdefault(_format_daily_title(today, fmt), fmt)
 
-                if results:
-                    logger.info("Found daily note with format: %s -> %s", fmt, date_str)
-                    self._daily_note_format = fmt
-                    return fmt
+        logger.info("Trying daily note formats: %s", list(candidates))
 
-            except AuthenticationError:
-                # Re-raise authentication errors - these are critical
-                raise
-            except (RoamAPIError, InvalidQueryError, ValueError, KeyError) as e:
-                # Log specific expected errors during format detection
-                logger.debug("Format %s failed: %s", fmt, e)
-                continue
+        # Probe every candidate in one query instead of one roundtrip each.
+        # The titles are bound as query inputs, so they need no escaping and
+        # the query text is the same on every run.
+        try:
+            results = self.run_query(_QUERY_EXISTING_TITLES, args=[list(candidates)])
+        except AuthenticationError:
+            # Re-raise authentication errors - these are critical
+            raise
+        except (RoamAPIError, InvalidQueryError) as e:
+            # Log specific expected errors during format detection
+            logger.debug("Daily note format detection failed: %s", e)
+            results = []
+
+        found = {row[0] for row in results if row}
+        for date_str, fmt in candidates.items():
+            if date_str in found:
+                logger.info("Found daily note with format: %s -> %s", fmt, date_str)
+                self._daily_note_format = fmt
+                return fmt
 
         logger.warning("No daily note format found, using default")
         self._daily_note_format = DEFAULT_DATE_FORMAT
         return self._daily_note_format
 
+    def _get_references_to_pages(
+        self, page_titles: list[str], max_results: int = DEFAULT_MAX_REFERENCES
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Get backlinks for several pages in one query.
+
+        Args:
+            page_titles: Titles of the pages to find references to.
+            max_results: Maximum number of references to return per page.
+
+        Returns:
+            Dict mapping every requested title to its referencing blocks, in
+            the get_references_to_page format. Titles map to empty lists if
+            they have no references or a recoverable error occurs.
+
+        Raises:
+            AuthenticationError: If authentication fails (critical error).
+            InvalidQueryError: If the query is rejected as invalid.
+        """
+        buckets: dict[str, list[dict[str, Any]]] = {
+            f"[[{title}]]": [] for title in page_titles
+        }
+        try:
+            results = self.run_query(
+                _QUERY_REFERENCES_TO_PAGES, args=[list(buckets)], cache=True
+            )
+        except (AuthenticationError, InvalidQueryError):
+            raise
+        except RoamAPIError as e:
+            logger.warning("Error finding references to %s: %s", page_titles, e)
+            results = []
+
+        for needle, uid, string in results:
+            bucket = buckets[needle]
+            if len(bucket) < max_results:
+                bucket.append({"uid": uid, "string": string})
+        return {needle[2:-2]: refs for needle, refs in buckets.items()}
+
     def get_daily_notes_context(self, days: int = 10, max_references: int = 10) -> str:
         """Get the last N days of daily notes with references TO those daily note pages.
 
@@ -749,67 +1270,105 @@ class RoamAPI:
         Raises:
             RoamAPIError: If there are API errors during data retrieval.
         """
-        context_parts = []
-
         # Auto-detect the daily note format
         date_format = self.find_daily_note_format()
         logger.info("Using daily note format: %s", date_format)
 
-        # Get the last N days
-        for i in range(days):
-            date = datetime.now() - timedelta(days=i)
+        # Get the last N days, anchored to a single "now" so the range can't
+        # shift if the loop straddles midnight
+        now = datetime.now().date()
+        date_strs = [
+            _format_daily_title(now - timedelta(days=i), date_format)
+            for i in range(days)
+        ]
 
-            if date_format == DATE_FORMAT_ORDINAL:
-                date_str = date.strftime(f"%B %d{ordinal_suffix(date.day)}, %Y")
-            else:
-                date_str = date.strftime(date_format)
+        # Two queries for the whole range: every existing daily page with its
+        # block tree, then backlinks for those pages
+        pages = self._pull_pages_by_title(date_strs) if date_strs else {}
+        logger.info("Found %d of %d daily notes", len(pages), days)
+        found = [date_str for date_str in date_strs if date_str in pages]
+        references = (
+            self._get_references_to_pages(found, max_references) if found else {}
+        )
+        # Walk date_strs so days stay newest-first
+        sections = [
+            self._format_daily_note_section(
+                date_str, pages[date_str], references[date_str]
+            )
+            for date_str in found
+        ]
+        # Collect header, separators and every section's fragments into one
+        # flat list so the output is built with a single join and no
+        # per-section or per-page intermediate strings.
+        parts = ["# Daily Notes Context\n\n"]
+        for section in sections:
+            if section:
+                if len(parts) > 1:
+                    parts.append("\n\n")
+                parts.extend(section)
+
+        if len(parts) == 1:
+            parts.append("No daily notes found for the specified time range.")
+        return "".join(parts)
+
+    def _pull_pages_by_title(self, titles: list[str]) -> dict[str, dict[str, Any]]:
+        """Pull several pages with their block trees in one query.
 
-            logger.info("Processing daily note: %s", date_str)
+        Args:
+            titles: Page titles to pull.
 
-            # Build this day's section
-            day_content = [f"## {date_str}\n"]
+        Returns:
+            Dict mapping each existing title to its page data, in the get_page
+            format. Titles with no page are absent.
 
-            try:
-                # Get the daily note page content
-                page_data = self.get_page(date_str)
-
-                # Add the daily note content
-                if ":block/children" in page_data and page_data[":block/children"]:
-                    children = page_data[":block/children"]
-                    daily_markdown = self.process_blocks(children, 0)
-                    if daily_markdown.strip():
-                        day_content.append("### Daily Note Content\n")
-                        day_content.append(daily_markdown)
-
-                # Get references TO this daily note page
-                references = self.get_references_to_page(date_str, max_references)
-                if references:
-                    count = len(references)
-                    ref_header = f"### References to {date_str} ({count} found)\n"
-                    day_content.append(ref_header)
-                    for ref in references:
-                        day_content.append(f"- {ref['string']}\n")
-
-                # Only add if we have content
-                if len(day_content) > 1:  # More than just the header
-                    context_parts.append("".join(day_content))
-                    logger.info(
-                        "Added daily note: %s with %d refs", date_str, len(references)
-                    )
+        Raises:
+            RoamAPIError: If the API request fails.
+        """
+        results = self.run_query(_QUERY_PULL_PAGES_BY_TITLE, args=[titles], cache=True)
+        return dict(results)
 
-            except PageNotFoundError as e:
-                # Daily note doesn't exist for this day
-                logger.debug("Daily note %s not found: %s", date_str, e)
-                continue
+    def _format_daily_note_section(
+        self,
+        date_str: str,
+        page_data: dict[str, Any],
+        references: list[dict[str, Any]],
+    ) -> list[str] | None:
+        """Build the context section for a single daily note.
 
-        # Combine everything
-        if context_parts:
-            return "# Daily Notes Context\n\n" + "\n\n".join(context_parts)
-        else:
-            return (
-                "# Daily Notes Context\n\n"
-                "No daily notes found for the specified time range."
-            )
+        Args:
+            date_str: Title of the daily note page.
+            page_data: The pulled daily note page.
+            references: Blocks referencing the daily note page.
+
+        Returns:
+            Markdown fragments for the day's section, to be joined by the
+            caller, or None if the page has neither content nor references.
+        """
+        # Build this day's section
+        day_content = [f"## {date_str}\n"]
+
+        # Add the daily note content. Every emitted block carries a bullet,
+        # so any fragment at all means there is visible content.
+        children = page_data.get(":block/children")
+        if children:
+            fragments = list(self._iter_blocks(children))
+            if fragments:
+                day_content.append("### Daily Note Content\n")
+                day_content.extend(fragments)
+
+        # Add references TO this daily note page
+        if references:
+            count = len(references)
+            ref_header = f"### References to {date_str} ({count} found)\n"
+            day_content.append(ref_header)
+            for ref in references:
+                day_content.extend(("- ", ref["string"], "\n"))
+
+        # Only add if we have content
+        if len(day_content) == 1:  # Just the header
+            return None
+        logger.info("Added daily note: %s with %d refs", date_str, len(references))
+        return day_content
 
     def process_blocks(
         self,
@@ -818,7 +1377,7 @@ class RoamAPI:
         extract_links: bool = False,
         linked_pages: set[str] | None = None,
     ) -> str:
-        """Recursively process blocks and convert them to markdown.
+        """Process blocks and their nested children into markdown.
 
         This unified function handles both simple markdown conversion and link
         extraction, eliminating code duplication between server.py and roam_api.
@@ -848,34 +1407,59 @@ class RoamAPI:
                 "linked_pages parameter is required when extract_links=True"
             )
 
-        result = ""
-        indent = "  " * depth
+        return "".join(
+            self._iter_blocks(blocks, depth, linked_pages if extract_links else None)
+        )
+
+    @staticmethod
+    def _iter_blocks(
+        blocks: list[dict[str, Any]],
+        depth: int = 0,
+        linked_pages: set[str] | None = None,
+    ) -> Iterator[str]:
+        """Yield the markdown fragments for blocks and their nested children.
+
+        Callers that assemble a larger document can extend their own parts
+        list with the fragments instead of building an intermediate string.
+
+        Args:
+            blocks: List of blocks to process
+            depth: Current nesting level (0 = top level)
+            linked_pages: If given, [[page]] links are collected into this set
+
+        Yields:
+            Indentation bullets, block strings and newlines, in outline order.
+        """
+        # Iterative depth-first walk with an explicit stack: no Python frame per
+        # nesting level and no RecursionError on very deep outlines. Children
+        # are pushed in reverse so they pop in their original order.
+        stack = [(block, depth) for block in reversed(blocks)]
+
+        while stack:
+            block, level = stack.pop()
 
-        for block in blocks:
             # Get the block string content
             block_string = block.get(":block/string", "")
-            if not block_string:  # Skip empty blocks
+            if not block_string:  # Skip empty blocks (and their children)
                 continue
 
-            # Extract linked pages from [[Page Name]] syntax if requested
-            if extract_links and linked_pages is not None:
-                page_links = re.findall(r"\[\[([^\]]+)\]\]", block_string)
-                for page_link in page_links:
-                    linked_pages.add(page_link)
-
-            # Add this block with proper indentation
-            result += f"{indent}- {block_string}\n"
-
-            # Process children recursively if they exist
-            if ":block/children" in block and block[":block/children"]:
-                result += self.process_blocks(
-                    block[":block/children"],
-                    depth + 1,
-                    extract_links=extract_links,
-                    linked_pages=linked_pages,
-                )
+            # Extract linked pages from [[Page Name]] syntax if requested. Most
+            # blocks have no link, and a substring check is cheaper than
+            # starting a regex scan.
+            if linked_pages is not None and "[[" in block_string:
+                linked_pages.update(_PAGE_LINK_RE.findall(block_string))
 
-        return result
+            # Emit this block with proper indentation
+            if level < _INDENT_CACHE_DEPTH:
+                yield _BULLETS[level]
+            else:
+                yield "  " * level + "- "
+            yield block_string
+            yield "\n"
+
+            children = block.get(":block/children")
+            if children:
+                stack.extend((child, level + 1) for child in reversed(children))
 
     def get_blocks_for_sync(
         self, since_timestamp: int | None = None
@@ -894,47 +1478,194 @@ class RoamAPI:
                 - page_uid: UID of the containing page
                 - page_title: Title of the containing page
         """
-        if since_timestamp is not None:
-            query = f"""[:find ?uid ?string ?edit-time ?page-uid ?page-title
-                         :where
-                         [?b :block/uid ?uid]
-                         [?b :block/string ?string]
-                         [?b :edit/time ?edit-time]
-                         [(> ?edit-time {since_timestamp})]
-                         [?b :block/page ?page]
-                         [?page :block/uid ?page-uid]
-                         [?page :node/title ?page-title]]"""
+        return self._rows_to_sync_blocks(self._fetch_sync_rows(since_timestamp))
+
+    def get_block_records_for_sync(
+        self, since_timestamp: int | None = None
+    ) -> list[BlockRecord]:
+        """Fetch blocks for vector index sync as slotted records.
+
+        Same data as get_blocks_for_sync, with attribute access instead of
+        per-block dicts.
+
+        Args:
+            since_timestamp: If provided, only fetch blocks modified after this
+                timestamp (in milliseconds since epoch). If None, fetches all blocks.
+
+        Returns:
+            List of BlockRecord instances.
+        """
+        return [BlockRecord(*row) for row in self._fetch_sync_rows(since_timestamp)]
+
+    @staticmethod
+    def _rows_to_sync_blocks(results: list[Any]) -> list[dict[str, Any]]:
+        """Convert sync query rows into block dicts.
+
+        Args:
+            results: Rows of (uid, string, edit-time, page-uid, page-title).
+
+        Returns:
+            List of block dicts keyed by uid, content, edit_time, page_uid and
+            page_title.
+        """
+        # Every block on a page repeats its page uid and title; the JSON
+        # decoder allocates a fresh string for each, so share one per value
+        shared: dict[str, str] = {}
+        return [
+            {
+                "uid": r[0],
+                "content": r[1],
+                "edit_time": r[2],
+                "page_uid": shared.setdefault(r[3], r[3]),
+                "page_title": shared.setdefault(r[4], r[4]),
+            }
+            for r in results
+        ]
+
+    def iter_blocks_for_sync(
+        self,
+        max_windows: int = SYNC_MAX_WINDOWS,
+        min_window_ms: int = SYNC_MIN_WINDOW_MS,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Stream all blocks for vector index sync in edit-time windows.
+
+        Splits the graph's actual edit-time range into equal
+        [start, start + width) windows, so only one window of rows is held
+        at a time and the consumer can embed and store each batch before the
+        next is fetched. The width is the range divided by max_windows, but
+        never below min_window_ms, so a sweep costs one query for the range
+        plus at most max_windows window queries however old the graph is.
+
+        Args:
+            max_windows: Upper bound on window queries per sweep.
+            min_window_ms: Narrowest window, in milliseconds.
+
+        Yields:
+            Non-empty lists of blocks in the get_blocks_for_sync format, in
+            ascending edit-time window order.
+
+        Raises:
+            ValueError: If max_windows or min_window_ms is not positive.
+        """
+        if max_windows <= 0:
+            raise ValueError(f"max_windows must be positive, got {max_windows}")
+        if min_window_ms <= 0:
+            raise ValueError(f"min_window_ms must be positive, got {min_window_ms}")
+
+        bounds = self.run_query(_QUERY_SYNC_EDIT_TIME_RANGE)
+        if not bounds or bounds[0][0] is None:
+            return
+        start, last = bounds[0]
+        # Ceiling division so max_windows windows always cover the range
+        window_ms = max(min_window_ms, -(-(last - start + 1) // max_windows))
+
+        while start <= last:
+            end = start + window_ms
+            results = self.run_query(_QUERY_SYNC_BLOCKS_BETWEEN, args=[start, end])
+            logger.info(
+                "Fetched %d blocks edited in [%d, %d)", len(results), start, end
+            )
+            if results:
+                self._bump_graph_version()
+                yield self._rows_to_sync_blocks(results)
+            start = end
+
+    def get_blocks_for_sync_columnar(
+        self, since_timestamp: int | None = None
+    ) -> dict[str, Any]:
+        """Fetch blocks for vector index sync as columns instead of dicts.
+
+        Same data as get_blocks_for_sync, but one sequence per field, which
+        avoids a dict per block and lets consumers walk a single field (e.g.
+        all contents for embedding) directly.
+
+        Args:
+            since_timestamp: If provided, only fetch blocks modified after this
+                timestamp (in milliseconds since epoch). If None, fetches all blocks.
+
+        Returns:
+            Dict with equal-length columns:
+                - uid: list of block UIDs
+                - content: list of block text contents
+                - edit_time: array('q') of edit timestamps in milliseconds
+                - page_uid: list of containing page UIDs
+                - page_title: list of containing page titles
+        """
+        results = self._fetch_sync_rows(since_timestamp)
+        if results:
+            uids, contents, edit_times, page_uids, page_titles = map(
+                list, zip(*results, strict=True)
+            )
         else:
-            query = """[:find ?uid ?string ?edit-time ?page-uid ?page-title
-                        :where
-                        [?b :block/uid ?uid]
-                        [?b :block/string ?string]
-                        [?b :edit/time ?edit-time]
-                        [?b :block/page ?page]
-                        [?page :block/uid ?page-uid]
-                        [?page :node/title ?page-title]]"""
-
-        results = self.run_query(query)
-        blocks = []
-        for row in results:
-            uid, content, edit_time, page_uid, page_title = row
-            blocks.append(
-                {
-                    "uid": uid,
-                    "content": content,
-                    "edit_time": edit_time,
-                    "page_uid": page_uid,
-                    "page_title": page_title,
-                }
+            uids, contents, edit_times, page_uids, page_titles = [], [], [], [], []
+        return {
+            "uid": uids,
+            "content": contents,
+            "edit_time": array("q", edit_times),
+            "page_uid": page_uids,
+            "page_title": page_titles,
+        }
+
+    def get_blocks_since_cursor(
+        self, cursor: int, inclusive: bool = False
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Fetch blocks changed after a sync cursor and the cursor to use next.
+
+        The cursor is the largest edit time already synced. Feeding the returned
+        cursor into the next call turns every sync after the initial bootstrap
+        (get_blocks_for_sync with no timestamp) into an O(changed blocks) query.
+
+        Args:
+            cursor: Edit timestamp (milliseconds since epoch) already synced.
+            inclusive: If True, also re-fetch blocks edited exactly at the
+                cursor. Use this to tolerate clock jitter when the consumer
+                upserts idempotently.
+
+        Returns:
+            Tuple of (blocks in the get_blocks_for_sync format, new cursor).
+            The new cursor is the max edit time seen, or the given cursor if
+            nothing changed.
+        """
+        blocks = self._rows_to_sync_blocks(self._fetch_sync_rows(cursor, inclusive))
+        new_cursor = max((b["edit_time"] for b in blocks), default=cursor)
+        return blocks, new_cursor
+
+    def _fetch_sync_rows(
+        self, since_timestamp: int | None, inclusive: bool = False
+    ) -> list[Any]:
+        """Run the sync query and return its raw rows.
+
+        Args:
+            since_timestamp: If provided, only fetch blocks modified after this
+                timestamp (in milliseconds since epoch). If None, fetches all blocks.
+            inclusive: If True, also include blocks edited exactly at
+                since_timestamp.
+
+        Returns:
+            Rows of (uid, string, edit-time, page-uid, page-title).
+        """
+        if since_timestamp is not None:
+            # Edit times are integer milliseconds; a float would be sent as
+            # e.g. 1.7e12 and compared on a slower mixed-type path
+            since_timestamp = int(since_timestamp)
+            query = (
+                _QUERY_SYNC_BLOCKS_SINCE_INCLUSIVE
+                if inclusive
+                else _QUERY_SYNC_BLOCKS_SINCE
             )
+            results = self.run_query(query, args=[since_timestamp])
+        else:
+            results = self.run_query(_QUERY_SYNC_BLOCKS)
 
         if since_timestamp is not None:
             logger.info(
-                "Fetched %d blocks modified since %d", len(blocks), since_timestamp
+                "Fetched %d blocks modified since %d", len(results), since_timestamp
             )
         else:
-            logger.info("Fetched %d blocks for sync", len(blocks))
-        return blocks
+            logger.info("Fetched %d blocks for sync", len(results))
+        if results:
+            self._bump_graph_version()
+        return results
 
     def get_block_parent_chain(self, block_uid: str) -> list[str]:
         """Get parent block content strings from root to immediate parent.
@@ -945,30 +1676,62 @@ class RoamAPI:
         Returns:
             List of parent block content strings, ordered from root to immediate
             parent. Returns empty list if block has no parents or is not found.
+            Chains are memoized until the next write or non-empty sync fetch.
         """
-        # Sanitize input
-        sanitized_uid = self._sanitize_query_input(block_uid)
+        return self.get_block_parent_chains([block_uid])[block_uid]
 
-        # Query to get all ancestors with their order values
-        # Uses Roam's :block/parents attribute which contains all ancestors
-        query = f"""[:find ?parent-string ?parent-order
-                     :where
-                     [?b :block/uid "{sanitized_uid}"]
-                     [?b :block/parents ?parent]
-                     [?parent :block/string ?parent-string]
-                     [?parent :block/order ?parent-order]]"""
+    def get_block_parent_chains(self, block_uids: list[str]) -> dict[str, list[str]]:
+        """Get parent chains for many blocks in a single query.
 
-        try:
-            results = self.run_query(query)
-            if not results:
-                return []
+        Args:
+            block_uids: UIDs of the blocks to get parents for.
 
-            # Sort by order (lower order = closer to root)
-            sorted_parents = sorted(results, key=lambda x: x[1])
-            return [parent[0] for parent in sorted_parents]
+        Returns:
+            Dict mapping every requested UID to its parent content strings,
+            ordered from root to immediate parent. Blocks with no parents, that
+            are not found, or whose lookup failed map to an empty list.
+        """
+        chains: dict[str, list[str]] = {}
+        missing: list[str] = []
+        with self._parent_chain_cache_lock:
+            version = self._graph_version
+            for uid in dict.fromkeys(block_uids):
+                cached = self._parent_chain_cache.get((uid, version))
+                if cached is not None:
+                    chains[uid] = list(cached)
+                else:
+                    missing.append(uid)
+        if not missing:
+            return chains
+
+        try:
+            results = self.run_query(_QUERY_PARENT_CHAINS, args=[missing])
         except RoamAPIError as e:
-            logger.warning("Error getting parent chain for %s: %s", block_uid, e)
-            return []
+            logger.warning("Error getting parent chains for %s: %s", missing, e)
+            for uid in missing:
+                chains[uid] = []
+            return chains
+
+        # Group (order, string) pairs per block, then sort each group by order
+        # (lower order = closer to root). Roam's Datalog has no :order-by.
+        grouped: dict[str, list[tuple[int, str]]] = {uid: [] for uid in missing}
+        for uid, parent_string, parent_order in results:
+            grouped[uid].append((parent_order, parent_string))
+
+        with self._parent_chain_cache_lock:
+            # Skip storing if a write landed while the query was in flight
+            store = version == self._graph_version
+            for uid, parents in grouped.items():
+                parents.sort(key=itemgetter(0))
+                chain = tuple(parent[1] for parent in parents)
+                chains[uid] = list(chain)
+                if store:
+                    if len(self._parent_chain_cache) >= PARENT_CHAIN_CACHE_SIZE:
+                        del self._parent_chain_cache[
+                            next(iter(self._parent_chain_cache))
+                        ]
+                    self._parent_chain_cache[(uid, version)] = chain
+        return chains
 
     def get_block_children_preview(
         self, block_uid: str, limit: int = 3
@@ -982,7 +1745,7 @@ class RoamAPI:
         Returns:
             List of child block dicts with 'uid' and 'content' keys.
         """
-        sanitized_uid = self._sanitize_query_input(block_uid)
+        sanitized_uid = self._sanitize_uid(block_uid)
 
         query = f"""[:find ?child-uid ?child-string ?child-order
                      :where
@@ -993,7 +1756,7 @@ class RoamAPI:
                      [?child :block/order ?child-order]]"""
 
         try:
-            results = self.run_query(query)
+            results = self.run_query(query, cache=True)
             if not results:
                 return []
 
@@ -1013,7 +1776,7 @@ class RoamAPI:
         Returns:
             Number of blocks referencing this block.
         """
-        sanitized_uid = self._sanitize_query_input(block_uid)
+        sanitized_uid = self._sanitize_uid(block_uid)
 
         # Search for blocks containing (( block_uid )) reference
         query = f"""[:find (count ?b)
@@ -1023,7 +1786,7 @@ class RoamAPI:
                      ]"""
 
         try:
-            results = self.run_query(query)
+            results = self.run_query(query, cache=True)
             if results and results[0]:
                 return results[0][0]
             return 0
@@ -1044,7 +1807,7 @@ class RoamAPI:
             Dict with 'before' and 'after' lists of sibling blocks.
             Each sibling has 'uid' and 'content' keys.
         """
-        sanitized_uid = self._sanitize_query_input(block_uid)
+        sanitized_uid = self._sanitize_uid(block_uid)
 
         # First get the parent and the block's order
         parent_query = f"""[:find ?parent-uid ?block-order
@@ -1055,23 +1818,17 @@ class RoamAPI:
                            [?b :block/order ?block-order]]"""
 
         try:
-            parent_results = self.run_query(parent_query)
+            parent_results = self.run_query(parent_query, cache=True)
             if not parent_results:
                 return {"before": [], "after": []}
 
             parent_uid, block_order = parent_results[0]
-            sanitized_parent = self._sanitize_query_input(parent_uid)
-
-            # Get all siblings with their order
-            siblings_query = f"""[:find ?sib-uid ?sib-string ?sib-order
-                                 :where
-                                 [?parent :block/uid "{sanitized_parent}"]
-                                 [?parent :block/children ?sib]
-                                 [?sib :block/uid ?sib-uid]
-                                 [?sib :block/string ?sib-string]
-                                 [?sib :block/order ?sib-order]]"""
-
-            siblings_results = self.run_query(siblings_query)
+
+            # Get all siblings with their order. The parent UID came from the
+            # server, so it is bound as an input rather than re-sanitized.
+            siblings_results = self.run_query(
+                _QUERY_CHILDREN_OF_PARENT, args=[parent_uid], cache=True
+            )
             if not siblings_results:
                 return {"before": [], "after": []}
 
@@ -4,11 +4,10 @@ import json
 import logging
 import re
 import time
+from collections.abc import Iterable
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
-from dotenv import load_dotenv
-
 if TYPE_CHECKING:
     from mcp_server_roam.embedding import EmbeddingService
     from mcp_server_roam.vector_store import VectorStore
@@ -30,9 +29,6 @@ from mcp_server_roam.vector_store import SyncStatus, get_vector_store
 
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-load_dotenv()
-
 # Singleton instance for RoamAPI client
 _roam_client: RoamAPI | None = None
 
@@ -247,6 +243,79 @@ SYNC_BATCH_SIZE = 64
 SYNC_COMMIT_INTERVAL = 500
 
 
+def _store_and_embed_blocks(
+    blocks: list[dict[str, Any]],
+    store: "VectorStore",
+    embedding_service: "EmbeddingService",
+) -> tuple[int, int | None]:
+    """Store block metadata and embeddings in SYNC_BATCH_SIZE batches.
+
+    Blocks whose content is blank are stored but not embedded, and any
+    embedding left from before they were cleared is removed.
+
+    Args:
+        blocks: Blocks in the get_blocks_for_sync format.
+        store: VectorStore instance.
+        embedding_service: EmbeddingService instance.
+
+    Returns:
+        Tuple of (number of blocks embedded, latest edit_time among the
+        blocks or None if none have one).
+    """
+    # Store block metadata
+    store.upsert_blocks(blocks)
+    logger.debug("Stored metadata for %d blocks", len(blocks))
+
+    # Incremental syncs return cleared blocks so their rows are updated;
+    # there is nothing to embed for them
+    to_embed = [block for block in blocks if block["content"].strip()]
+    if len(to_embed) < len(blocks):
+        store.delete_embeddings(
+            [block["uid"] for block in blocks if not block["content"].strip()]
+        )
+
+    # Generate and store embeddings in batches
+    total_embedded = 0
+    num_batches = (len(to_embed) + SYNC_BATCH_SIZE - 1) // SYNC_BATCH_SIZE
+    for batch_num, i in enumerate(range(0, len(to_embed), SYNC_BATCH_SIZE), 1):
+        batch = to_embed[i : i + SYNC_BATCH_SIZE]
+
+        # Format blocks for embedding with context
+        texts = []
+        uids = []
+        for block in batch:
+            # Get parent chain for context (skip for now to avoid rate limits)
+            # parent_chain = roam.get_block_parent_chain(block["uid"])
+            parent_chain = None
+
+            formatted_text = embedding_service.format_block_for_embedding(
+                content=block["content"],
+                page_title=block.get("page_title"),
+                parent_chain=parent_chain,
+            )
+            texts.append(formatted_text)
+            uids.append(block["uid"])
+
+        # Generate embeddings
+        embeddings = embedding_service.embed_texts(texts)
+
+        # Store embeddings
+        store.upsert_embeddings(uids, embeddings)
+        total_embedded += len(uids)
+
+        # Log progress every 10 batches or on last batch
+        if batch_num % 10 == 0 or batch_num == num_batches:
+            logger.info(
+                "Embedding progress: %d/%d batches (%d blocks)",
+                batch_num,
+                num_batches,
+                total_embedded,
+            )
+
+    edit_times = [b["edit_time"] for b in blocks if b.get("edit_time")]
+    return total_embedded, max(edit_times) if edit_times else None
+
+
 def sync_index(full: bool = False) -> str:
     """Build or update the vector index for semantic search.
 
@@ -269,17 +338,12 @@ def sync_index(full: bool = False) -> str:
         # Determine if we need a full sync
         do_full_sync = full or current_status == SyncStatus.NOT_INITIALIZED
 
+        chunks: Iterable[list[dict[str, Any]]]
         if do_full_sync:
             logger.info("Starting full sync - dropping existing data")
             store.drop_all_data()
             store.set_sync_status(SyncStatus.IN_PROGRESS)
-            fetch_start = time.time()
-            blocks = roam.get_blocks_for_sync()
-            logger.info(
-                "Fetched %d blocks from Roam API in %.1fs",
-                len(blocks),
-                time.time() - fetch_start,
-            )
+            chunks = roam.iter_blocks_for_sync()
         else:
             # Incremental sync - get blocks modified since last sync
             last_timestamp = store.get_last_sync_timestamp()
@@ -287,13 +351,7 @@ def sync_index(full: bool = False) -> str:
                 # No previous sync, do full
                 logger.info("No previous sync found - performing full sync")
                 store.set_sync_status(SyncStatus.IN_PROGRESS)
-                fetch_start = time.time()
-                blocks = roam.get_blocks_for_sync()
-                logger.info(
-                    "Fetched %d blocks from Roam API in %.1fs",
-                    len(blocks),
-                    time.time() - fetch_start,
-                )
+                chunks = roam.iter_blocks_for_sync()
             else:
                 store.set_sync_status(SyncStatus.IN_PROGRESS)
                 logger.debug("Incremental sync from timestamp %d", last_timestamp)
@@ -301,74 +359,52 @@ def sync_index(full: bool = False) -> str:
                 logger.info(
                     "Found %d modified blocks for incremental sync", len(blocks)
                 )
+                chunks = [blocks] if blocks else []
 
-        if not blocks:
+        # Full syncs arrive one edit-time window at a time; each window is
+        # stored and embedded before the next is fetched, so only one
+        # window of blocks is held in memory
+        embed_elapsed = 0.0
+        total_processed = 0
+        total_embedded = 0
+        latest_edit_time: int | None = None
+        for chunk in chunks:
+            embed_start = time.time()
+            embedded, chunk_latest = _store_and_embed_blocks(
+                chunk, store, embedding_service
+            )
+            embed_elapsed += time.time() - embed_start
+            total_processed += len(chunk)
+            total_embedded += embedded
+            if chunk_latest is not None and (
+                latest_edit_time is None or chunk_latest > latest_edit_time
+            ):
+                latest_edit_time = chunk_latest
+            logger.info("Synced %d blocks (%d so far)", len(chunk), total_processed)
+
+        if not total_processed:
             store.set_sync_status(SyncStatus.COMPLETED)
             elapsed = time.time() - start_time
             return f"No blocks to sync. Completed in {elapsed:.1f}s."
 
-        # Store block metadata
-        store.upsert_blocks(blocks)
-        logger.debug("Stored metadata for %d blocks", len(blocks))
-
-        # Generate and store embeddings in batches
-        embed_start = time.time()
-        total_embedded = 0
-        num_batches = (len(blocks) + SYNC_BATCH_SIZE - 1) // SYNC_BATCH_SIZE
-        for batch_num, i in enumerate(range(0, len(blocks), SYNC_BATCH_SIZE), 1):
-            batch = blocks[i : i + SYNC_BATCH_SIZE]
-
-            # Format blocks for embedding with context
-            texts = []
-            uids = []
-            for block in batch:
-                # Get parent chain for context (skip for now to avoid rate limits)
-                # parent_chain = roam.get_block_parent_chain(block["uid"])
-                parent_chain = None
-
-                formatted_text = embedding_service.format_block_for_embedding(
-                    content=block["content"],
-                    page_title=block.get("page_title"),
-                    parent_chain=parent_chain,
-                )
-                texts.append(formatted_text)
-                uids.append(block["uid"])
-
-            # Generate embeddings
-            embeddings = embedding_service.embed_texts(texts)
-
-            # Store embeddings
-            store.upsert_embeddings(uids, embeddings)
-            total_embedded += len(uids)
-
-            # Log progress every 10 batches or on last batch
-            if batch_num % 10 == 0 or batch_num == num_batches:
-                logger.info(
-                    "Embedding progress: %d/%d batches (%d blocks)",
-                    batch_num,
-                    num_batches,
-                    total_embedded,
-                )
-
         # Update sync timestamp to the latest edit_time
-        edit_times = [b["edit_time"] for b in blocks if b.get("edit_time")]
-        if edit_times:
-            store.set_last_sync_timestamp(max(edit_times))
+        if latest_edit_time is not None:
+            store.set_last_sync_timestamp(latest_edit_time)
         store.set_sync_status(SyncStatus.COMPLETED)
 
-        embed_elapsed = time.time() - embed_start
         elapsed = time.time() - start_time
         sync_type = "Full" if do_full_sync else "Incremental"
         logger.info(
-            "%s sync completed: %d blocks in %.1fs (embedding: %.1fs)",
+            "%s sync completed: %d blocks (%d embedded) in %.1fs (embedding: %.1fs)",
             sync_type,
+            total_processed,
             total_embedded,
             elapsed,
             embed_elapsed,
         )
         return (
             f"{sync_type} sync completed in {elapsed:.1f}s. "
-            f"Processed {len(blocks)} blocks, embedded {total_embedded}."
+            f"Processed {total_processed} blocks, embedded {total_embedded}."
         )
 
     except RoamAPIError as e:
@@ -410,28 +446,11 @@ def _incremental_sync(
 
     logger.info("Incremental sync: updating %d modified blocks", len(modified_blocks))
 
-    # Store block metadata
-    store.upsert_blocks(modified_blocks)
-
-    # Generate and store embeddings
-    texts = []
-    uids = []
-    for block in modified_blocks:
-        formatted_text = embedding_service.format_block_for_embedding(
-            content=block["content"],
-            page_title=block.get("page_title"),
-            parent_chain=None,
-        )
-        texts.append(formatted_text)
-        uids.append(block["uid"])
-
-    embeddings = embedding_service.embed_texts(texts)
-    store.upsert_embeddings(uids, embeddings)
-
-    # Update sync timestamp
-    edit_times = [b["edit_time"] for b in modified_blocks if b.get("edit_time")]
-    if edit_times:
-        store.set_last_sync_timestamp(max(edit_times))
+    _, latest_edit_time = _store_and_embed_blocks(
+        modified_blocks, store, embedding_service
+    )
+    if latest_edit_time is not None:
+        store.set_last_sync_timestamp(latest_edit_time)
 
     return len(modified_blocks)
 
@@ -452,6 +471,11 @@ def calculate_recency_boost(edit_time_ms: int, now_ms: int) -> float:
     return 0.0
 
 
+# Compiled once: extract_references runs for every search result
+_TAG_RE = re.compile(r"(?<!\[\[)#([\w-]+)")  # #hashtags, not inside [[]]
+_PAGE_REF_RE = re.compile(r"\[\[([^\]]+)\]\]")  # [[Page Name]] references
+
+
 def extract_references(content: str) -> dict[str, list[str]]:
     """Extract tags and page references from block content.
 
@@ -461,11 +485,8 @@ def extract_references(content: str) -> dict[str, list[str]]:
     Returns:
         Dict with 'tags' (list of #hashtags) and 'page_refs' (list of [[Page]] refs).
     """
-    # Extract #hashtags (word characters after #, not inside [[]])
-    tags = re.findall(r"(?<!\[\[)#([\w-]+)", content)
-
-    # Extract [[Page Name]] references
-    page_refs = re.findall(r"\[\[([^\]]+)\]\]", content)
+    tags = _TAG_RE.findall(content)
+    page_refs = _PAGE_REF_RE.findall(content)
 
     return {"tags": list(set(tags)), "page_refs": list(set(page_refs))}
 
@@ -561,15 +582,20 @@ def semantic_search(
         boosted_results.sort(key=lambda x: x["boosted_similarity"], reverse=True)
         final_results = boosted_results[:limit]
 
+        # Parent chain context, fetched for all results in one round-trip
+        if include_context:
+            missing_chains = [r for r in final_results if not r.get("parent_chain")]
+            if missing_chains:
+                parent_chains = roam.get_block_parent_chains(
+                    [result["uid"] for result in missing_chains]
+                )
+                for result in missing_chains:
+                    result["parent_chain"] = parent_chains[result["uid"]] or None
+
         # Fetch additional context for each result
         for result in final_results:
             uid = result["uid"]
 
-            # Parent chain context
-            if include_context and not result.get("parent_chain"):
-                parent_chain = roam.get_block_parent_chain(uid)
-                result["parent_chain"] = parent_chain if parent_chain else None
-
             # Children preview (Phase 1)
             if include_children:
                 result["children"] = roam.get_block_children_preview(
@@ -264,6 +264,30 @@ class VectorStore:
         self.conn.commit()
         return len(uids)
 
+    def delete_embeddings(self, uids: list[str]) -> int:
+        """Remove embeddings for blocks that no longer have content to embed.
+
+        Args:
+            uids: List of block UIDs.
+
+        Returns:
+            Number of embeddings deleted.
+        """
+        if not uids:
+            return 0
+
+        placeholders = ",".join("?" * len(uids))
+        cursor = self.conn.execute(
+            f"DELETE FROM vec_embeddings WHERE uid IN ({placeholders})",
+            uids,
+        )
+        self.conn.execute(
+            f"UPDATE blocks SET embedded_at = NULL WHERE uid IN ({placeholders})",
+            uids,
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
     def search(
         self,
         query_embedding: "NDArray[np.float32]",
@@ -6,6 +6,7 @@ import runpy
 import sys
 from unittest.mock import MagicMock, patch
 
+import pytest
 from click.testing import CliRunner
 
 from mcp_server_roam import main
@@ -96,6 +97,43 @@ class TestMainFunction:
             # Verify exit code is 0
             assert result.exit_code == 0
 
+    def test_main_preload_embeddings(self) -> None:
+        """Test that --preload-embeddings loads the model before serving."""
+        runner = CliRunner()
+        mock_service = MagicMock()
+
+        with (
+            patch("mcp_server_roam.serve", new=MagicMock()),
+            patch("asyncio.run") as mock_run,
+            patch.object(logging, "basicConfig"),
+            patch(
+                "mcp_server_roam.embedding.get_embedding_service",
+                return_value=mock_service,
+            ) as mock_get_service,
+        ):
+            result = runner.invoke(main, ["--preload-embeddings"])
+
+            assert result.exit_code == 0
+            mock_get_service.assert_called_once_with()
+            mock_run.assert_called_once()
+
+    def test_main_no_preload_by_default(self) -> None:
+        """Test that the embedding model is not loaded at startup by default."""
+        runner = CliRunner()
+
+        with (
+            patch("mcp_server_roam.serve", new=MagicMock()),
+            patch("asyncio.run"),
+            patch.object(logging, "basicConfig"),
+            patch(
+                "mcp_server_roam.embedding.get_embedding_service"
+            ) as mock_get_service,
+        ):
+            result = runner.invoke(main)
+
+            assert result.exit_code == 0
+            mock_get_service.assert_not_called()
+
     def test_main_long_verbose_option(self) -> None:
         """Test main function with --verbose option."""
         runner = CliRunner()
@@ -127,6 +165,55 @@ class TestMainFunction:
             assert "stream" in call_kwargs
 
 
+class TestLazyExports:
+    """Tests for the package's lazily resolved exports."""
+
+    def test_import_does_not_load_submodules(self) -> None:
+        """Test that importing the package defers server and API imports."""
+        import subprocess
+
+        code = (
+            "import sys, mcp_server_roam; "
+            "loaded = [m for m in ('mcp_server_roam.server', "
+            "'mcp_server_roam.roam_api', 'mcp_server_roam.embedding') "
+            "if m in sys.modules]; "
+            "print(loaded)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+
+        assert result.returncode == 0
+        assert result.stdout.strip() == "[]"
+
+    def test_exports_resolve(self) -> None:
+        """Test that lazy exports resolve to the submodule objects."""
+        import mcp_server_roam
+        from mcp_server_roam import roam_api
+
+        assert mcp_server_roam.RoamAPI is roam_api.RoamAPI
+        assert mcp_server_roam.RateLimitError is roam_api.RateLimitError
+
+    def test_unknown_attribute_raises(self) -> None:
+        """Test that unknown attributes raise AttributeError."""
+        import mcp_server_roam
+
+        with pytest.raises(AttributeError, match="no attribute 'missing'"):
+            _ = mcp_server_roam.missing  # type: ignore[attr-defined]
+
+    def test_dir_lists_lazy_exports(self) -> None:
+        """Test that dir() includes exports that are not loaded yet."""
+        import mcp_server_roam
+
+        names = dir(mcp_server_roam)
+        assert "RoamAPI" in names
+        assert "serve" in names
+        assert "main" in names
+
+
 class TestModuleMain:
     """Tests for __main__.py module."""
 
@@ -1,12 +1,24 @@
 """Unit tests for the embedding service."""
 
+from unittest.mock import MagicMock
+
 import numpy as np
+import pytest
 from pytest_mock import MockerFixture
 
 from mcp_server_roam.embedding import (
+    BACKEND_ONNX,
+    BACKEND_TORCH,
+    BATCH_SIZE_CANDIDATES,
+    BATCH_SIZE_PROBE_BUDGET_SECONDS,
+    BATCH_SIZE_PROBE_SAMPLES,
     DEFAULT_BATCH_SIZE,
     DEFAULT_MODEL_NAME,
+    DTYPE_BFLOAT16,
+    DTYPE_FLOAT32,
     EMBEDDING_DIMENSIONS,
+    INT8_SCALE,
+    ONNX_MODEL_FILE,
     EmbeddingService,
     get_embedding_service,
 )
@@ -32,6 +44,196 @@ class TestEmbeddingService:
         service = EmbeddingService()
         assert service.dimensions == EMBEDDING_DIMENSIONS
 
+    def test_init_default_backend(self, mocker: MockerFixture) -> None:
+        """Test that the torch backend is used when nothing is configured."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service = EmbeddingService()
+        assert service.backend == BACKEND_TORCH
+
+    def test_init_backend_from_env(self, mocker: MockerFixture) -> None:
+        """Test that the backend is read from ROAM_EMBED_BACKEND."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_BACKEND": "onnx"})
+        service = EmbeddingService()
+        assert service.backend == BACKEND_ONNX
+
+    def test_init_explicit_backend_overrides_env(self, mocker: MockerFixture) -> None:
+        """Test that an explicit backend argument wins over the env var."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_BACKEND": "onnx"})
+        service = EmbeddingService(backend="torch")
+        assert service.backend == BACKEND_TORCH
+
+    def test_init_invalid_backend(self) -> None:
+        """Test that an unsupported backend raises ValueError."""
+        with pytest.raises(ValueError) as exc_info:
+            EmbeddingService(backend="tensorflow")
+        assert "Unsupported embedding backend 'tensorflow'" in str(exc_info.value)
+
+    def test_model_loading_onnx_backend(self, mocker: MockerFixture) -> None:
+        """Test that the ONNX backend loads the quantized ONNX export."""
+        mock_transformer = mocker.MagicMock()
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer = mock_transformer
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        service = EmbeddingService(backend="onnx")
+        model = service.model
+
+        assert model == mock_transformer.return_value
+        mock_transformer.assert_called_once_with(
+            DEFAULT_MODEL_NAME,
+            device=None,
+            backend="onnx",
+            model_kwargs={"file_name": ONNX_MODEL_FILE},
+        )
+
+    def test_init_default_dtype(self, mocker: MockerFixture) -> None:
+        """Test that float32 weights are used when nothing is configured."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service = EmbeddingService()
+        assert service.dtype == DTYPE_FLOAT32
+
+    def test_init_dtype_from_env(self, mocker: MockerFixture) -> None:
+        """Test that the dtype is read from ROAM_EMBED_DTYPE."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_DTYPE": "bfloat16"}, clear=True)
+        service = EmbeddingService()
+        assert service.dtype == DTYPE_BFLOAT16
+
+    def test_init_invalid_dtype(self) -> None:
+        """Test that an unsupported dtype raises ValueError."""
+        with pytest.raises(ValueError) as exc_info:
+            EmbeddingService(dtype="float16")
+        assert "Unsupported embedding dtype 'float16'" in str(exc_info.value)
+
+    def test_init_bfloat16_requires_torch_backend(self) -> None:
+        """Test that bfloat16 cannot be combined with the ONNX backend."""
+        with pytest.raises(ValueError) as exc_info:
+            EmbeddingService(backend="onnx", dtype="bfloat16")
+        assert "requires the 'torch' backend" in str(exc_info.value)
+
+    def test_model_loading_bfloat16(self, mocker: MockerFixture) -> None:
+        """Test that bfloat16 casts weights and upcasts pooling inputs."""
+
+        class FakePooling:
+            def __init__(self) -> None:
+                self.hooks: list = []
+
+            def register_forward_pre_hook(self, hook: object) -> None:
+                self.hooks.append(hook)
+
+        pooling = FakePooling()
+        mock_model = mocker.MagicMock()
+        mock_model.__iter__.return_value = iter([object(), pooling])
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer.return_value = mock_model
+        mock_models_module = mocker.MagicMock()
+        mock_models_module.Pooling = FakePooling
+        mock_torch = mocker.MagicMock()
+        mocker.patch.dict(
+            "sys.modules",
+            {
+                "sentence_transformers": mock_st_module,
+                "sentence_transformers.models": mock_models_module,
+                "torch": mock_torch,
+            },
+        )
+
+        service = EmbeddingService(backend="torch", dtype="bfloat16")
+        model = service.model
+
+        assert model == mock_model
+        mock_model.to.assert_called_once_with(dtype=mock_torch.bfloat16)
+        assert len(pooling.hooks) == 1
+
+        token_embeddings = mocker.MagicMock()
+        features = {"token_embeddings": token_embeddings}
+        pooling.hooks[0](pooling, (features,))
+        assert features["token_embeddings"] == token_embeddings.float.return_value
+
+    def test_init_threads_from_env(self, mocker: MockerFixture) -> None:
+        """Test that the thread count is read from ROAM_EMBED_THREADS."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_THREADS": "8"})
+        service = EmbeddingService()
+        assert service._num_threads == 8
+
+    def test_init_threads_default(self, mocker: MockerFixture) -> None:
+        """Test that PyTorch's default is kept when nothing is configured."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service = EmbeddingService()
+        assert service._num_threads is None
+
+    def test_init_threads_explicit_overrides_env(self, mocker: MockerFixture) -> None:
+        """Test that an explicit thread count wins over the env var."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_THREADS": "8"})
+        service = EmbeddingService(num_threads=2)
+        assert service._num_threads == 2
+
+    def test_init_threads_env_not_integer(self, mocker: MockerFixture) -> None:
+        """Test that a non-integer ROAM_EMBED_THREADS raises ValueError."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_THREADS": "many"})
+        with pytest.raises(ValueError) as exc_info:
+            EmbeddingService()
+        assert "Invalid ROAM_EMBED_THREADS 'many'" in str(exc_info.value)
+
+    def test_init_threads_not_positive(self) -> None:
+        """Test that a non-positive thread count raises ValueError."""
+        with pytest.raises(ValueError) as exc_info:
+            EmbeddingService(num_threads=0)
+        assert "must be positive, got 0" in str(exc_info.value)
+
+    def test_model_loading_sets_threads(self, mocker: MockerFixture) -> None:
+        """Test that the configured thread count is applied at model load."""
+        mock_st_module = mocker.MagicMock()
+        mock_torch = mocker.MagicMock()
+        mock_torch.get_num_threads.return_value = 4
+        mocker.patch.dict(
+            "sys.modules",
+            {"sentence_transformers": mock_st_module, "torch": mock_torch},
+        )
+
+        service = EmbeddingService(num_threads=4)
+        _ = service.model
+
+        mock_torch.set_num_threads.assert_called_once_with(4)
+        mock_torch.set_num_interop_threads.assert_not_called()
+
+    def test_device_auto_detected_by_default(self, mocker: MockerFixture) -> None:
+        """Test that no device is forced when nothing is configured."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer.return_value.device = "cuda:0"
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        service = EmbeddingService()
+
+        assert service.device == "cuda:0"
+        mock_st_module.SentenceTransformer.assert_called_once_with(
+            DEFAULT_MODEL_NAME, device=None
+        )
+
+    def test_device_from_env(self, mocker: MockerFixture) -> None:
+        """Test that the device is read from ROAM_EMBED_DEVICE."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_DEVICE": "cpu"})
+        mock_st_module = mocker.MagicMock()
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        _ = EmbeddingService().model
+
+        mock_st_module.SentenceTransformer.assert_called_once_with(
+            DEFAULT_MODEL_NAME, device="cpu"
+        )
+
+    def test_device_explicit_overrides_env(self, mocker: MockerFixture) -> None:
+        """Test that an explicit device wins over the env var."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_DEVICE": "cpu"})
+        mock_st_module = mocker.MagicMock()
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        _ = EmbeddingService(device="cuda:1").model
+
+        mock_st_module.SentenceTransformer.assert_called_once_with(
+            DEFAULT_MODEL_NAME, device="cuda:1"
+        )
+
     def test_model_lazy_loading(self, mocker: MockerFixture) -> None:
         """Test that model is lazily loaded on first access."""
         mock_transformer = mocker.MagicMock()
@@ -54,7 +256,7 @@ class TestEmbeddingService:
 
         # Now model should be loaded
         assert model == mock_model
-        mock_transformer.assert_called_once_with(DEFAULT_MODEL_NAME)
+        mock_transformer.assert_called_once_with(DEFAULT_MODEL_NAME, device=None)
 
     def test_model_singleton_within_instance(self, mocker: MockerFixture) -> None:
         """Test that model is only loaded once per instance."""
@@ -77,6 +279,50 @@ class TestEmbeddingService:
         # Should only be instantiated once
         mock_transformer.assert_called_once()
 
+    def test_model_loaded_once_across_threads(self, mocker: MockerFixture) -> None:
+        """Test that concurrent first accesses load the model only once."""
+        import threading
+        import time
+
+        def slow_load(*args: object, **kwargs: object) -> object:
+            time.sleep(0.05)
+            return mocker.MagicMock()
+
+        mock_transformer = mocker.MagicMock(side_effect=slow_load)
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer = mock_transformer
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        service = EmbeddingService()
+        models: list[object] = []
+        threads = [
+            threading.Thread(target=lambda: models.append(service.model))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_transformer.assert_called_once()
+        assert all(model is models[0] for model in models)
+
+    def test_model_double_checked_inside_lock(self, mocker: MockerFixture) -> None:
+        """Test that a model loaded while waiting on the lock is reused."""
+        service = EmbeddingService()
+        loaded = mocker.MagicMock()
+
+        class LoadingLock:
+            def __enter__(self) -> None:
+                service._model = loaded
+
+            def __exit__(self, *args: object) -> None:
+                return None
+
+        service._model_lock = LoadingLock()  # type: ignore[assignment]
+
+        assert service.model is loaded
+
     def test_embed_texts_empty_list(self, mocker: MockerFixture) -> None:
         """Test embedding empty list returns empty array."""
         service = EmbeddingService()
@@ -111,6 +357,7 @@ class TestEmbeddingService:
             batch_size=DEFAULT_BATCH_SIZE,
             show_progress_bar=False,
             convert_to_numpy=True,
+            normalize_embeddings=True,
         )
 
     def test_embed_texts_multiple_texts(self, mocker: MockerFixture) -> None:
@@ -141,6 +388,24 @@ class TestEmbeddingService:
         assert result.shape == (3, EMBEDDING_DIMENSIONS)
         assert result.dtype == np.float32
 
+    def test_embed_texts_float32_not_copied(self, mocker: MockerFixture) -> None:
+        """Test that float32 output from the model is returned without copying."""
+        mock_transformer = mocker.MagicMock()
+        mock_model = mocker.MagicMock()
+        mock_transformer.return_value = mock_model
+
+        mock_embeddings = np.zeros((2, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        mock_model.encode.return_value = mock_embeddings
+
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer = mock_transformer
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        service = EmbeddingService()
+        result = service.embed_texts(["a", "b"])
+
+        assert result is mock_embeddings
+
     def test_embed_texts_custom_batch_size(self, mocker: MockerFixture) -> None:
         """Test embedding with custom batch size."""
         mock_transformer = mocker.MagicMock()
@@ -163,16 +428,86 @@ class TestEmbeddingService:
             batch_size=32,
             show_progress_bar=False,
             convert_to_numpy=True,
+            normalize_embeddings=True,
         )
 
+    def test_embed_texts_accepts_iterable(self, mocker: MockerFixture) -> None:
+        """Test that embed_texts materializes non-list iterables."""
+        mock_model = mocker.MagicMock()
+        mock_model.encode.return_value = np.zeros(
+            (2, EMBEDDING_DIMENSIONS), dtype=np.float32
+        )
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer.return_value = mock_model
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        service = EmbeddingService()
+        result = service.embed_texts(text for text in ("a", "b"))
+
+        assert result.shape == (2, EMBEDDING_DIMENSIONS)
+        assert mock_model.encode.call_args[0][0] == ["a", "b"]
+
+    def test_embed_texts_empty_iterable(self) -> None:
+        """Test that an empty iterable returns an empty array."""
+        result = EmbeddingService().embed_texts(iter([]))
+
+        assert result.shape == (0, EMBEDDING_DIMENSIONS)
+
+    def test_embed_texts_streaming(self, mocker: MockerFixture) -> None:
+        """Test that streaming yields one array per batch."""
+        mock_model = mocker.MagicMock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: np.zeros(
+            (len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32
+        )
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer.return_value = mock_model
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        service = EmbeddingService()
+        texts = (f"text {i}" for i in range(5))
+        batches = list(service.embed_texts_streaming(texts, batch_size=2))
+
+        assert [batch.shape[0] for batch in batches] == [2, 2, 1]
+        assert mock_model.encode.call_count == 3
+
+    def test_embed_texts_streaming_empty(self) -> None:
+        """Test that streaming an empty iterable yields nothing."""
+        service = EmbeddingService()
+        assert list(service.embed_texts_streaming([], batch_size=2)) == []
+
+    def test_embed_texts_int8(self, mocker: MockerFixture) -> None:
+        """Test int8 quantization of normalized embeddings."""
+        mock_model = mocker.MagicMock()
+        row = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+        row[:4] = [1.0, -1.0, 0.5, -0.003]
+        mock_model.encode.return_value = row.reshape(1, -1)
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer.return_value = mock_model
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+
+        service = EmbeddingService()
+        result = service.embed_texts_int8(["test"])
+
+        assert result.dtype == np.int8
+        assert result.shape == (1, EMBEDDING_DIMENSIONS)
+        assert result[0, :4].tolist() == [127, -127, 64, 0]
+        np.testing.assert_allclose(result[0] * INT8_SCALE, row, atol=INT8_SCALE)
+
+    def test_embed_texts_int8_empty(self) -> None:
+        """Test int8 embedding of an empty list."""
+        result = EmbeddingService().embed_texts_int8([])
+
+        assert result.shape == (0, EMBEDDING_DIMENSIONS)
+        assert result.dtype == np.int8
+
     def test_embed_single(self, mocker: MockerFixture) -> None:
         """Test embedding a single text returns 1D array."""
         mock_transformer = mocker.MagicMock()
         mock_model = mocker.MagicMock()
         mock_transformer.return_value = mock_model
 
-        mock_embeddings = np.array([[0.1] * EMBEDDING_DIMENSIONS], dtype=np.float32)
-        mock_model.encode.return_value = mock_embeddings
+        mock_embedding = np.array([0.1] * EMBEDDING_DIMENSIONS, dtype=np.float64)
+        mock_model.encode.return_value = mock_embedding
 
         # Patch sys.modules to avoid importing the real sentence_transformers
         mock_st_module = mocker.MagicMock()
@@ -184,6 +519,330 @@ class TestEmbeddingService:
 
         assert result.shape == (EMBEDDING_DIMENSIONS,)
         assert result.dtype == np.float32
+        assert result.flags["C_CONTIGUOUS"]
+        assert result.base is None
+        mock_model.encode.assert_called_once_with(
+            "test text",
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+
+
+class TestEmbeddingCache:
+    """Tests for the content-hash embedding cache."""
+
+    @staticmethod
+    def _service_with_model(
+        mocker: MockerFixture, cache_size: int = 100
+    ) -> tuple[EmbeddingService, MagicMock]:
+        """Create a service whose model encodes each text to a distinct row."""
+        mock_model = mocker.MagicMock()
+
+        def encode(texts: list[str], **kwargs: object) -> np.ndarray:
+            return np.array(
+                [[float(len(text))] * EMBEDDING_DIMENSIONS for text in texts],
+                dtype=np.float32,
+            )
+
+        mock_model.encode.side_effect = encode
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer.return_value = mock_model
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+        return EmbeddingService(cache_size=cache_size), mock_model
+
+    def test_repeat_texts_served_from_cache(self, mocker: MockerFixture) -> None:
+        """Test that a second call with the same texts skips the model."""
+        service, mock_model = self._service_with_model(mocker)
+
+        first = service.embed_texts(["a", "bb"])
+        second = service.embed_texts(["a", "bb"])
+
+        assert mock_model.encode.call_count == 1
+        np.testing.assert_array_equal(first, second)
+
+    def test_only_misses_are_encoded(self, mocker: MockerFixture) -> None:
+        """Test that cached and new texts are combined in input order."""
+        service, mock_model = self._service_with_model(mocker)
+        service.embed_texts(["a"])
+
+        result = service.embed_texts(["ccc", "a", "bb"])
+
+        last_call = mock_model.encode.call_args
+        assert last_call[0][0] == ["ccc", "bb"]
+        assert result.shape == (3, EMBEDDING_DIMENSIONS)
+        assert result.dtype == np.float32
+        assert result[:, 0].tolist() == [3.0, 1.0, 2.0]
+
+    def test_duplicates_within_call_encoded_once(self, mocker: MockerFixture) -> None:
+        """Test that duplicate texts in one call are encoded a single time."""
+        service, mock_model = self._service_with_model(mocker)
+
+        result = service.embed_texts(["a", "bb", "a"])
+
+        mock_model.encode.assert_called_once()
+        assert mock_model.encode.call_args[0][0] == ["a", "bb"]
+        assert result[:, 0].tolist() == [1.0, 2.0, 1.0]
+
+    def test_all_hits_skip_model(self, mocker: MockerFixture) -> None:
+        """Test that a fully cached call does not touch the model."""
+        service, mock_model = self._service_with_model(mocker)
+        service.embed_texts(["a", "bb"])
+
+        result = service.embed_texts(["bb"])
+
+        assert mock_model.encode.call_count == 1
+        assert result[:, 0].tolist() == [2.0]
+
+    def test_cache_is_isolated_from_returned_array(self, mocker: MockerFixture) -> None:
+        """Test that mutating a returned array does not corrupt the cache."""
+        service, _ = self._service_with_model(mocker)
+
+        first = service.embed_texts(["a"])
+        first[:] = 0.0
+
+        assert service.embed_texts(["a"])[0, 0] == 1.0
+
+    def test_least_recently_used_evicted(self, mocker: MockerFixture) -> None:
+        """Test that the cache evicts the least recently used entry."""
+        service, mock_model = self._service_with_model(mocker, cache_size=2)
+        service.embed_texts(["a", "bb"])
+        service.embed_texts(["a"])  # refresh "a"
+        service.embed_texts(["ccc"])  # evicts "bb"
+
+        service.embed_texts(["a"])
+        assert mock_model.encode.call_count == 2
+        service.embed_texts(["bb"])
+        assert mock_model.encode.call_count == 3
+
+    def test_cache_disabled(self, mocker: MockerFixture) -> None:
+        """Test that cache_size=0 disables memoization."""
+        service, mock_model = self._service_with_model(mocker, cache_size=0)
+
+        service.embed_texts(["a"])
+        service.embed_texts(["a"])
+
+        assert mock_model.encode.call_count == 2
+        assert len(service._cache) == 0
+
+    def test_embed_single_uses_cache(self, mocker: MockerFixture) -> None:
+        """Test that embed_single shares the cache with embed_texts."""
+        service, mock_model = self._service_with_model(mocker)
+        service.embed_texts(["query"])
+
+        result = service.embed_single("query")
+
+        assert mock_model.encode.call_count == 1
+        assert result.shape == (EMBEDDING_DIMENSIONS,)
+
+    def test_embed_single_populates_cache(self, mocker: MockerFixture) -> None:
+        """Test that a single-text miss is cached for later calls."""
+        service, mock_model = self._service_with_model(mocker)
+        mock_model.encode.side_effect = None
+        mock_model.encode.return_value = np.full(
+            EMBEDDING_DIMENSIONS, 0.5, dtype=np.float32
+        )
+
+        first = service.embed_single("query")
+        first[:] = 0.0
+        second = service.embed_single("query")
+        batch = service.embed_texts(["query"])
+
+        assert mock_model.encode.call_count == 1
+        assert second[0] == 0.5
+        assert batch[0, 0] == 0.5
+
+
+class TestBatchSizeAutoTuning:
+    """Tests for batch size configuration and auto-tuning."""
+
+    @staticmethod
+    def _service_with_model(
+        mocker: MockerFixture, **kwargs: object
+    ) -> tuple[EmbeddingService, MagicMock]:
+        """Create a service whose model returns zero vectors of the right shape."""
+        mock_model = mocker.MagicMock()
+        mock_model.encode.side_effect = lambda texts, **_: np.zeros(
+            (len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32
+        )
+        mock_st_module = mocker.MagicMock()
+        mock_st_module.SentenceTransformer.return_value = mock_model
+        mocker.patch.dict("sys.modules", {"sentence_transformers": mock_st_module})
+        return EmbeddingService(**kwargs), mock_model  # type: ignore[arg-type]
+
+    def test_batch_size_from_env(self, mocker: MockerFixture) -> None:
+        """Test that ROAM_EMBED_BATCH_SIZE skips the probe."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_BATCH_SIZE": "32"})
+        service, mock_model = self._service_with_model(mocker)
+
+        assert service.batch_size == 32
+        mock_model.encode.assert_not_called()
+
+    def test_explicit_batch_size_overrides_env(self, mocker: MockerFixture) -> None:
+        """Test that an explicit batch size wins over the env var."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_BATCH_SIZE": "32"})
+        service, _ = self._service_with_model(mocker, batch_size=8)
+
+        assert service.batch_size == 8
+
+    def test_invalid_batch_size_env(self, mocker: MockerFixture) -> None:
+        """Test that a non-integer ROAM_EMBED_BATCH_SIZE raises ValueError."""
+        mocker.patch.dict("os.environ", {"ROAM_EMBED_BATCH_SIZE": "big"})
+        with pytest.raises(ValueError) as exc_info:
+            EmbeddingService()
+        assert "Invalid ROAM_EMBED_BATCH_SIZE 'big'" in str(exc_info.value)
+
+    @staticmethod
+    def _fake_clock(
+        mocker: MockerFixture,
+        mock_model: MagicMock,
+        seconds_per_text: dict[int, float] | float,
+    ) -> list[float]:
+        """Make encode advance a fake perf_counter by a per-text cost."""
+        clock = [0.0]
+
+        def encode(texts: list[str], batch_size: int, **_: object) -> np.ndarray:
+            if isinstance(seconds_per_text, dict):
+                cost = seconds_per_text[batch_size]
+            else:
+                cost = seconds_per_text
+            clock[0] += cost * len(texts)
+            return np.zeros((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+        mock_model.encode.side_effect = encode
+        mocker.patch(
+            "mcp_server_roam.embedding.time.perf_counter",
+            side_effect=lambda: clock[0],
+        )
+        return clock
+
+    def test_probe_picks_fastest_candidate(self, mocker: MockerFixture) -> None:
+        """Test that the probe selects the highest-throughput batch size."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service, mock_model = self._service_with_model(mocker)
+        clock = self._fake_clock(
+            mocker,
+            mock_model,
+            {16: 0.002, 32: 0.0015, 64: 0.001, 128: 0.0008, 256: 0.0009},
+        )
+
+        assert service.batch_size == 128
+        # Warm-up plus one timed run per candidate, all within the budget
+        assert mock_model.encode.call_count == 1 + len(BATCH_SIZE_CANDIDATES)
+        probe_sizes = [
+            call.kwargs["batch_size"] for call in mock_model.encode.call_args_list
+        ]
+        assert probe_sizes[1:] == list(BATCH_SIZE_CANDIDATES)
+        assert all(
+            len(call.args[0]) == BATCH_SIZE_PROBE_SAMPLES
+            for call in mock_model.encode.call_args_list[1:]
+        )
+        assert clock[0] <= BATCH_SIZE_PROBE_BUDGET_SECONDS
+
+    def test_probe_stops_before_overrunning_budget(self, mocker: MockerFixture) -> None:
+        """Test that a slow model stops the probe before the budget is exceeded."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service, mock_model = self._service_with_model(mocker)
+        # Warm-up 0.08s, then 0.64s per candidate: only one candidate fits
+        clock = self._fake_clock(mocker, mock_model, 0.005)
+
+        # One measurement can't be compared, so the default is kept
+        assert service.batch_size == DEFAULT_BATCH_SIZE
+        assert mock_model.encode.call_count == 2
+        assert clock[0] <= BATCH_SIZE_PROBE_BUDGET_SECONDS
+
+    def test_probe_counts_warm_up_against_budget(self, mocker: MockerFixture) -> None:
+        """Test that a warm-up predicting an overrun skips every candidate."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service, mock_model = self._service_with_model(mocker)
+        clock = self._fake_clock(mocker, mock_model, 0.05)
+
+        assert service.batch_size == DEFAULT_BATCH_SIZE
+        assert mock_model.encode.call_count == 1
+        assert clock[0] <= BATCH_SIZE_PROBE_BUDGET_SECONDS
+
+    def test_large_encode_uses_tuned_size_once(self, mocker: MockerFixture) -> None:
+        """Test that large encodes probe once and reuse the tuned size."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service, mock_model = self._service_with_model(mocker)
+        mocker.patch.object(service, "_probe_batch_size", return_value=128)
+
+        service.embed_texts([f"text {i}" for i in range(20)])
+        service.embed_texts([f"other {i}" for i in range(20)])
+
+        service._probe_batch_size.assert_called_once_with()  # type: ignore[attr-defined]
+        assert mock_model.encode.call_args.kwargs["batch_size"] == 128
+
+    def test_small_encode_skips_probe(self, mocker: MockerFixture) -> None:
+        """Test that encodes fitting in the smallest batch don't probe."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service, mock_model = self._service_with_model(mocker)
+        probe = mocker.patch.object(service, "_probe_batch_size")
+
+        service.embed_texts(["a", "b"])
+
+        probe.assert_not_called()
+        assert mock_model.encode.call_args.kwargs["batch_size"] == DEFAULT_BATCH_SIZE
+
+    def test_small_encode_uses_configured_size(self, mocker: MockerFixture) -> None:
+        """Test that a configured batch size applies to small encodes too."""
+        service, mock_model = self._service_with_model(mocker, batch_size=4)
+
+        service.embed_texts(["a", "b"])
+
+        assert mock_model.encode.call_args.kwargs["batch_size"] == 4
+
+    def test_streaming_uses_service_batch_size(self, mocker: MockerFixture) -> None:
+        """Test that streaming chunks by the service batch size by default."""
+        service, _ = self._service_with_model(mocker, batch_size=3)
+
+        batches = list(service.embed_texts_streaming(str(i) for i in range(7)))
+
+        assert [batch.shape[0] for batch in batches] == [3, 3, 1]
+
+    def test_streaming_small_input_skips_probe(self, mocker: MockerFixture) -> None:
+        """Test that short streams use the default size without probing."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service, mock_model = self._service_with_model(mocker)
+        probe = mocker.patch.object(service, "_probe_batch_size")
+
+        batches = list(service.embed_texts_streaming(iter(["a", "b"])))
+        assert list(service.embed_texts_streaming(iter([]))) == []
+
+        assert [batch.shape[0] for batch in batches] == [2]
+        probe.assert_not_called()
+        assert mock_model.encode.call_count == 1
+        assert mock_model.encode.call_args.kwargs["batch_size"] == DEFAULT_BATCH_SIZE
+
+    def test_streaming_large_input_probes_once(self, mocker: MockerFixture) -> None:
+        """Test that streams longer than a default batch use the tuned size."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service, _ = self._service_with_model(mocker)
+        probe = mocker.patch.object(service, "_probe_batch_size", return_value=50)
+
+        texts = (str(i) for i in range(DEFAULT_BATCH_SIZE + 10))
+        batches = list(service.embed_texts_streaming(texts))
+
+        probe.assert_called_once_with()
+        assert [batch.shape[0] for batch in batches] == [50, DEFAULT_BATCH_SIZE - 40]
+
+    def test_double_checked_inside_lock(self, mocker: MockerFixture) -> None:
+        """Test that a size tuned while waiting on the lock is reused."""
+        mocker.patch.dict("os.environ", {}, clear=True)
+        service = EmbeddingService()
+        probe = mocker.patch.object(service, "_probe_batch_size")
+
+        class TuningLock:
+            def __enter__(self) -> None:
+                service._batch_size = 96
+
+            def __exit__(self, *args: object) -> None:
+                return None
+
+        service._batch_size_lock = TuningLock()  # type: ignore[assignment]
+
+        assert service.batch_size == 96
+        probe.assert_not_called()
 
 
 class TestFormatBlockForEmbedding:
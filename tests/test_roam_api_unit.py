@@ -1,22 +1,46 @@
 """Comprehensive unit tests for roam_api.py module."""
 
+import json
+from array import array
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from mcp_server_roam.roam_api import (
+    HTTP_POOL_MAXSIZE,
+    MAX_REDIRECTS,
+    SYNC_MAX_WINDOWS,
+    SYNC_MIN_WINDOW_MS,
     AuthenticationError,
     BlockNotFoundError,
+    BlockRecord,
     InvalidQueryError,
     PageNotFoundError,
     RateLimitError,
     RoamAPI,
     RoamAPIError,
+    _format_daily_title,
+    _import_orjson,
+    _load_env,
+    _parse_redirect_location,
+    _parse_retry_after,
+    _sanitize_cached,
     ordinal_suffix,
     retry_with_backoff,
 )
 
 
+@pytest.fixture(autouse=True)
+def stdlib_json_codec() -> Iterator[None]:
+    """Pin the stdlib JSON codec, since mocked responses only configure .json()."""
+    with patch("mcp_server_roam.roam_api._orjson", None):
+        yield
+
+
 class TestOrdinalSuffix:
     """Tests for ordinal_suffix function."""
 
@@ -47,6 +71,85 @@ class TestOrdinalSuffix:
         assert ordinal_suffix(30) == "th"
 
 
+class TestFormatDailyTitle:
+    """Tests for _format_daily_title helper."""
+
+    def test_format_ordinal(self) -> None:
+        """Test ordinal titles use the precomputed suffix table."""
+        assert _format_daily_title(date(2025, 6, 1), "ordinal") == "June 01st, 2025"
+        assert _format_daily_title(date(2025, 6, 22), "ordinal") == "June 22nd, 2025"
+
+    def test_format_strftime(self) -> None:
+        """Test plain strftime patterns pass through."""
+        assert _format_daily_title(date(2025, 6, 13), "%Y-%m-%d") == "2025-06-13"
+
+    def test_format_memoized(self) -> None:
+        """Test repeat renders of the same day and format hit the cache."""
+        _format_daily_title.cache_clear()
+        _format_daily_title(date(2025, 6, 13), "%B %d, %Y")
+        _format_daily_title(date(2025, 6, 13), "%B %d, %Y")
+        assert _format_daily_title.cache_info().hits == 1
+
+
+class TestLoadEnv:
+    """Tests for the one-shot .env loader."""
+
+    def test_load_env_parses_file_once(self) -> None:
+        """Test that repeated calls only run load_dotenv once."""
+        _load_env.cache_clear()
+        try:
+            with patch("mcp_server_roam.roam_api.load_dotenv") as mock_load_dotenv:
+                _load_env()
+                _load_env()
+                _load_env()
+
+            mock_load_dotenv.assert_called_once_with()
+        finally:
+            _load_env.cache_clear()
+
+
+class TestJsonCodec:
+    """Tests for the optional orjson request/response codec."""
+
+    def test_import_orjson_when_installed(self) -> None:
+        """Test that orjson is picked up when the extra is installed."""
+        fake_orjson = MagicMock()
+        with patch.dict("sys.modules", {"orjson": fake_orjson}):
+            assert _import_orjson() is fake_orjson
+
+    def test_import_orjson_missing(self) -> None:
+        """Test fallback to the stdlib codec when orjson is absent."""
+        with patch.dict("sys.modules", {"orjson": None}):
+            assert _import_orjson() is None
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_orjson_encodes_request_and_decodes_response(
+        self, mock_post: MagicMock
+    ) -> None:
+        """Test that orjson handles both the request body and the response."""
+        fake_orjson = SimpleNamespace(
+            dumps=lambda obj: json.dumps(obj).encode(), loads=json.loads
+        )
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.is_redirect = False
+        mock_response.status_code = 200
+        mock_response.content = b'{"result": [["uid1"]]}'
+        mock_post.return_value = mock_response
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with patch("mcp_server_roam.roam_api._orjson", fake_orjson):
+            result = api.run_query("[:find ?uid :where [?b :block/uid ?uid]]")
+
+        assert result == [["uid1"]]
+        kwargs = mock_post.call_args.kwargs
+        assert "json" not in kwargs
+        assert json.loads(kwargs["data"]) == {
+            "query": "[:find ?uid :where [?b :block/uid ?uid]]"
+        }
+        mock_response.json.assert_not_called()
+
+
 class TestRetryWithBackoff:
     """Tests for retry_with_backoff decorator."""
 
@@ -65,8 +168,11 @@ class TestRetryWithBackoff:
         assert result == "success"
         assert call_count == 1
 
+    @patch("mcp_server_roam.roam_api.random.uniform", side_effect=lambda a, b: b)
     @patch("mcp_server_roam.roam_api.time.sleep")
-    def test_retry_success_after_failures(self, mock_sleep: MagicMock) -> None:
+    def test_retry_success_after_failures(
+        self, mock_sleep: MagicMock, mock_uniform: MagicMock
+    ) -> None:
         """Test that function succeeds after initial failures."""
         call_count = 0
 
@@ -88,9 +194,11 @@ class TestRetryWithBackoff:
         assert result == "success"
         assert call_count == 3
         assert mock_sleep.call_count == 2
-        # Verify backoff timing
-        mock_sleep.assert_any_call(1.0)
+        # Each jitter window runs from initial_backoff to multiplier x last sleep
+        mock_uniform.assert_any_call(1.0, 2.0)
+        mock_uniform.assert_any_call(1.0, 4.0)
         mock_sleep.assert_any_call(2.0)
+        mock_sleep.assert_any_call(4.0)
 
     @patch("mcp_server_roam.roam_api.time.sleep")
     def test_retry_exhausted(self, mock_sleep: MagicMock) -> None:
@@ -114,8 +222,11 @@ class TestRetryWithBackoff:
         assert call_count == 3  # Initial + 2 retries
         assert mock_sleep.call_count == 2
 
+    @patch("mcp_server_roam.roam_api.random.uniform", side_effect=lambda a, b: b)
     @patch("mcp_server_roam.roam_api.time.sleep")
-    def test_retry_max_backoff_capped(self, mock_sleep: MagicMock) -> None:
+    def test_retry_max_backoff_capped(
+        self, mock_sleep: MagicMock, mock_uniform: MagicMock
+    ) -> None:
         """Test that backoff is capped at max_backoff."""
         call_count = 0
 
@@ -134,13 +245,30 @@ class TestRetryWithBackoff:
         with pytest.raises(ConnectionError):
             always_fails()
 
-        # Backoff should be: 4.0, 10.0 (capped from 16), 10.0 (capped from 64)
+        # Upper bounds 16 and 40 are both capped at 10.0
         assert mock_sleep.call_count == 3
-        mock_sleep.assert_any_call(4.0)
-        # Second and third calls should be capped at 10.0
         calls = [call[0][0] for call in mock_sleep.call_args_list]
-        assert calls[1] == 10.0
-        assert calls[2] == 10.0
+        assert calls == [10.0, 10.0, 10.0]
+
+    @patch("mcp_server_roam.roam_api.time.sleep")
+    def test_retry_jitter_stays_within_bounds(self, mock_sleep: MagicMock) -> None:
+        """Test that jittered sleeps stay between initial and max backoff."""
+
+        @retry_with_backoff(
+            max_retries=20,
+            initial_backoff=1.0,
+            max_backoff=16.0,
+            retryable_exceptions=(ConnectionError,),
+        )
+        def always_fails() -> str:
+            raise ConnectionError("Connection failed")
+
+        with pytest.raises(ConnectionError):
+            always_fails()
+
+        calls = [call[0][0] for call in mock_sleep.call_args_list]
+        assert len(calls) == 20
+        assert all(1.0 <= sleep <= 16.0 for sleep in calls)
 
     def test_retry_non_retryable_exception(self) -> None:
         """Test that non-retryable exceptions are raised immediately."""
@@ -192,6 +320,25 @@ class TestRoamAPIInit:
                 RoamAPI(api_token="test-token")
             assert "ROAM_GRAPH_NAME" in str(exc_info.value)
 
+    def test_init_configures_pooled_session(self) -> None:
+        """Test that auth headers and a pooled adapter live on the session."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        headers = api._session.headers
+        assert headers["Authorization"] == "Bearer test-token"
+        assert headers["x-authorization"] == "Bearer test-token"
+        assert headers["Content-Type"] == "application/json; charset=utf-8"
+        adapter = api._session.get_adapter("https://api.roamresearch.com")
+        assert adapter._pool_maxsize == HTTP_POOL_MAXSIZE
+
+    def test_context_manager_closes_session(self) -> None:
+        """Test that leaving a with block closes the pooled session."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with patch.object(api._session, "close") as mock_close:
+            with api as entered:
+                assert entered is api
+                mock_close.assert_not_called()
+            mock_close.assert_called_once_with()
+
 
 class TestSanitizeQueryInput:
     """Tests for _sanitize_query_input method."""
@@ -220,6 +367,48 @@ class TestSanitizeQueryInput:
             api._sanitize_query_input("hello\x00world")
         assert "null bytes" in str(exc_info.value)
 
+    def test_sanitize_null_byte_before_suspicious_pattern(self) -> None:
+        """Test that a null byte is reported even alongside other patterns."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with pytest.raises(InvalidQueryError) as exc_info:
+            api._sanitize_query_input("\x00[:find ?e]")
+        assert "null bytes" in str(exc_info.value)
+
+    def test_sanitize_repeated_input_is_cached(self) -> None:
+        """Test that repeated inputs are served from the memo cache."""
+        _sanitize_cached.cache_clear()
+        RoamAPI._sanitize_query_input('cached "title"')
+        result = RoamAPI._sanitize_query_input('cached "title"')
+
+        assert result == 'cached ""title""'
+        info = _sanitize_cached.cache_info()
+        assert (info.hits, info.misses) == (1, 1)
+
+    def test_sanitize_rejected_input_not_cached(self) -> None:
+        """Test that rejected inputs raise on every call."""
+        for _ in range(2):
+            with pytest.raises(InvalidQueryError):
+                RoamAPI._sanitize_query_input("[:find ?e]")
+
+    def test_sanitize_string_without_quotes_returned_as_is(self) -> None:
+        """Test that inputs without quotes are returned without copying."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        _sanitize_cached.cache_clear()
+        value = "".join(["plain ", "title"])
+        assert api._sanitize_query_input(value) is value
+
+    def test_sanitize_fast_path_skips_cache(self) -> None:
+        """Test that inputs with no quote, null byte or '[' bypass the memo."""
+        _sanitize_cached.cache_clear()
+        assert RoamAPI._sanitize_query_input("abc123XYZ") == "abc123XYZ"
+        assert _sanitize_cached.cache_info().currsize == 0
+
+    def test_sanitize_bracket_without_pattern_returned_as_is(self) -> None:
+        """Test that harmless brackets go through validation unchanged."""
+        _sanitize_cached.cache_clear()
+        assert RoamAPI._sanitize_query_input("[[Page]]") == "[[Page]]"
+        assert _sanitize_cached.cache_info().misses == 1
+
     def test_sanitize_suspicious_find_pattern(self) -> None:
         """Test error for suspicious :find pattern."""
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
@@ -241,6 +430,28 @@ class TestSanitizeQueryInput:
             api._sanitize_query_input("[?b :block/string ...")
         assert "suspicious pattern" in str(exc_info.value)
 
+    def test_sanitize_suspicious_pattern_case_insensitive(self) -> None:
+        """Test that pattern matching ignores case and reports the match."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with pytest.raises(InvalidQueryError) as exc_info:
+            api._sanitize_query_input("title [:FIND ?e]")
+        assert "suspicious pattern: [:FIND" in str(exc_info.value)
+
+    def test_sanitize_uid_alphanumeric_fast_path(self) -> None:
+        """Test that alphanumeric UIDs are returned without a full scan."""
+        with patch.object(RoamAPI, "_sanitize_query_input") as mock_sanitize:
+            assert RoamAPI._sanitize_uid("Ab3kL9xQz") == "Ab3kL9xQz"
+        mock_sanitize.assert_not_called()
+
+    def test_sanitize_uid_falls_back(self) -> None:
+        """Test that other UIDs go through the general sanitizer."""
+        assert RoamAPI._sanitize_uid("ab-3_kL9x") == "ab-3_kL9x"
+        assert RoamAPI._sanitize_uid('a"b') == 'a""b'
+        with pytest.raises(InvalidQueryError):
+            RoamAPI._sanitize_uid("[?b")
+        with pytest.raises(InvalidQueryError, match="must be a string"):
+            RoamAPI._sanitize_uid(123)  # type: ignore[arg-type]
+
 
 class TestMaskToken:
     """Tests for _mask_token method."""
@@ -257,11 +468,16 @@ class TestMaskToken:
         assert api._mask_token("short") == "***"
         assert api._mask_token("12345678") == "***"
 
+    def test_masked_token_computed_once(self) -> None:
+        """Test that the client masks its own token at construction."""
+        api = RoamAPI(api_token="abcdefghij", graph_name="test-graph")
+        assert api._masked_token == "abcd...ghij"
+
 
 class TestRoamAPICall:
     """Tests for RoamAPI.call method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_success(self, mock_post: MagicMock) -> None:
         """Test successful API call."""
         mock_response = MagicMock()
@@ -276,7 +492,7 @@ class TestRoamAPICall:
         assert result == mock_response
         mock_post.assert_called_once()
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_redirect(self, mock_post: MagicMock) -> None:
         """Test API call with redirect."""
         # First call returns redirect
@@ -304,7 +520,29 @@ class TestRoamAPICall:
             "https://peer-123.api.roamresearch.com:8765"
         )
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_call_redirect_loop_is_bounded(self, mock_post: MagicMock) -> None:
+        """Test that endless redirects stop after MAX_REDIRECTS."""
+        redirect_response = MagicMock()
+        redirect_response.is_redirect = True
+        redirect_response.status_code = 307
+        redirect_response.headers = {
+            "Location": "https://peer-123.api.roamresearch.com:8765/api/graph/test"
+        }
+        mock_post.return_value = redirect_response
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with pytest.raises(RoamAPIError) as exc_info:
+            api.call("/api/graph/test-graph/q", {"query": "test"})
+
+        assert "Too many redirects" in str(exc_info.value)
+        assert mock_post.call_count == MAX_REDIRECTS + 1
+        # Requests after the first go to the cached peer
+        assert mock_post.call_args.args[0] == (
+            "https://peer-123.api.roamresearch.com:8765/api/graph/test-graph/q"
+        )
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_redirect_no_location(self, mock_post: MagicMock) -> None:
         """Test error when redirect has no Location header."""
         redirect_response = MagicMock()
@@ -319,7 +557,7 @@ class TestRoamAPICall:
             api.call("/api/graph/test-graph/q", {"query": "test"})
         assert "Redirect without Location header" in str(exc_info.value)
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_redirect_invalid_url(self, mock_post: MagicMock) -> None:
         """Test error when redirect URL cannot be parsed."""
         redirect_response = MagicMock()
@@ -334,7 +572,7 @@ class TestRoamAPICall:
             api.call("/api/graph/test-graph/q", {"query": "test"})
         assert "Could not parse redirect URL" in str(exc_info.value)
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_error_500(self, mock_post: MagicMock) -> None:
         """Test error handling for HTTP 500."""
         error_response = MagicMock()
@@ -350,7 +588,28 @@ class TestRoamAPICall:
             api.call("/api/graph/test-graph/q", {"query": "test"})
         assert "Server error (HTTP 500)" in str(exc_info.value)
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_call_error_body_truncated(self, mock_post: MagicMock) -> None:
+        """Test that large error bodies are capped and logging is skipped."""
+        error_response = MagicMock()
+        error_response.ok = False
+        error_response.is_redirect = False
+        error_response.status_code = 400
+        error_response.text = "x" * 10_000
+
+        mock_post.return_value = error_response
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with (
+            patch("mcp_server_roam.roam_api.logger") as mock_logger,
+            pytest.raises(InvalidQueryError) as exc_info,
+        ):
+            mock_logger.isEnabledFor.return_value = False
+            api.call("/api/graph/test-graph/q", {"query": "test"})
+        assert str(exc_info.value) == "Bad request (HTTP 400): " + "x" * 512
+        mock_logger.error.assert_not_called()
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_error_400(self, mock_post: MagicMock) -> None:
         """Test error handling for HTTP 400."""
         error_response = MagicMock()
@@ -366,7 +625,7 @@ class TestRoamAPICall:
             api.call("/api/graph/test-graph/q", {"query": "test"})
         assert "Bad request (HTTP 400)" in str(exc_info.value)
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_error_401(self, mock_post: MagicMock) -> None:
         """Test error handling for HTTP 401."""
         error_response = MagicMock()
@@ -383,7 +642,7 @@ class TestRoamAPICall:
         assert "Authentication error (HTTP 401)" in str(exc_info.value)
 
     @patch("mcp_server_roam.roam_api.time.sleep")
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_error_429(self, mock_post: MagicMock, mock_sleep: MagicMock) -> None:
         """Test error handling for HTTP 429 (rate limit)."""
         error_response = MagicMock()
@@ -391,6 +650,7 @@ class TestRoamAPICall:
         error_response.is_redirect = False
         error_response.status_code = 429
         error_response.text = "Too Many Requests"
+        error_response.headers = {}
 
         mock_post.return_value = error_response
 
@@ -398,8 +658,94 @@ class TestRoamAPICall:
         with pytest.raises(RateLimitError) as exc_info:
             api.call("/api/graph/test-graph/q", {"query": "test"})
         assert "Rate limit exceeded (HTTP 429)" in str(exc_info.value)
+        # Jittered waits start at the rate-limit floor and are capped
+        calls = [call[0][0] for call in mock_sleep.call_args_list]
+        assert len(calls) == 3
+        assert all(10.0 <= sleep <= 64.0 for sleep in calls)
+        assert exc_info.value.retry_after is None
+
+    @patch("mcp_server_roam.roam_api.time.sleep")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_call_429_honors_retry_after(
+        self, mock_post: MagicMock, mock_sleep: MagicMock
+    ) -> None:
+        """Test that the Retry-After header sets the rate-limit wait."""
+        error_response = MagicMock()
+        error_response.ok = False
+        error_response.is_redirect = False
+        error_response.status_code = 429
+        error_response.text = "Too Many Requests"
+        error_response.headers = {"Retry-After": "0.5"}
+
+        success_response = MagicMock()
+        success_response.ok = True
+        success_response.is_redirect = False
+        success_response.status_code = 200
+
+        mock_post.side_effect = [error_response, success_response]
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        result = api.call("/api/graph/test-graph/q", {"query": "test"})
+
+        assert result is success_response
+        mock_sleep.assert_called_once_with(0.5)
+
+    @patch("mcp_server_roam.roam_api.time.monotonic")
+    @patch("mcp_server_roam.roam_api.time.sleep")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_call_waits_out_active_rate_limit_backoff(
+        self, mock_post: MagicMock, mock_sleep: MagicMock, mock_monotonic: MagicMock
+    ) -> None:
+        """Test that new calls wait while another call is backing off."""
+        success_response = MagicMock()
+        success_response.ok = True
+        success_response.is_redirect = False
+        success_response.status_code = 200
+        mock_post.return_value = success_response
+        mock_monotonic.side_effect = [100.0, 200.0]
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api._rate_limited_until = 104.0
+        api.call("/api/graph/test-graph/q", {"query": "test"})
+        # The backoff window has passed, so the next call goes straight out
+        api.call("/api/graph/test-graph/q", {"query": "test"})
+
+        mock_sleep.assert_called_once_with(4.0)
+        assert mock_post.call_count == 2
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (None, None),
+            ("3", 3.0),
+            ("0", 0.0),
+            ("-1", None),
+            ("Wed, 21 Oct 2015 07:28:00 GMT", None),
+        ],
+    )
+    def test_parse_retry_after(self, value: str | None, expected: float | None) -> None:
+        """Test parsing of the Retry-After header."""
+        assert _parse_retry_after(value) == expected
+
+    @pytest.mark.parametrize(
+        ("location", "expected"),
+        [
+            (
+                "https://peer-123.api.roamresearch.com:8765/api/graph/test?x=1",
+                "https://peer-123.api.roamresearch.com:8765",
+            ),
+            ("https://peer-123.api.roamresearch.com/api/graph/test", None),
+            ("https://peer-123.api.roamresearch.com:notaport/api", None),
+            ("https://peer-abc.api.roamresearch.com:8765/api", None),
+            ("http://peer-123.api.roamresearch.com:8765/api", None),
+            ("https://invalid-url.com:8765/api", None),
+        ],
+    )
+    def test_parse_redirect_location(self, location: str, expected: str | None) -> None:
+        """Test extraction of the peer base URL from a redirect Location."""
+        assert _parse_redirect_location(location) == expected
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_call_error_other(self, mock_post: MagicMock) -> None:
         """Test error handling for other HTTP errors."""
         error_response = MagicMock()
@@ -419,7 +765,7 @@ class TestRoamAPICall:
 class TestRunQuery:
     """Tests for RoamAPI.run_query method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_run_query_success(self, mock_post: MagicMock) -> None:
         """Test successful query execution."""
         mock_response = MagicMock()
@@ -434,7 +780,7 @@ class TestRunQuery:
 
         assert result == [[1, "test"]]
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_run_query_with_args(self, mock_post: MagicMock) -> None:
         """Test query execution with arguments."""
         mock_response = MagicMock()
@@ -455,7 +801,7 @@ class TestRunQuery:
 class TestPull:
     """Tests for RoamAPI.pull method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_pull_success(self, mock_post: MagicMock) -> None:
         """Test successful pull."""
         mock_response = MagicMock()
@@ -472,11 +818,171 @@ class TestPull:
 
         assert result == {":block/string": "test", ":block/uid": "abc123"}
 
+    @staticmethod
+    def _pull_response(result: dict[str, str]) -> MagicMock:
+        """Build a successful pull response."""
+        response = MagicMock()
+        response.ok = True
+        response.is_redirect = False
+        response.status_code = 200
+        response.json.return_value = {"result": result}
+        return response
+
+    @patch("mcp_server_roam.roam_api.time.monotonic")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_pull_cached_until_ttl_expires(
+        self, mock_post: MagicMock, mock_monotonic: MagicMock
+    ) -> None:
+        """Test that repeat pulls hit the cache until the TTL lapses."""
+        mock_post.return_value = self._pull_response({":block/uid": "abc123"})
+        mock_monotonic.side_effect = [0.0, 59.0, 61.0]
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api.pull("123")
+        api.pull("123")
+        assert mock_post.call_count == 1
+
+        api.pull("123")
+        assert mock_post.call_count == 2
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_pull_cache_keyed_by_pattern_and_skips_misses(
+        self, mock_post: MagicMock
+    ) -> None:
+        """Test that patterns are cached separately and empty results aren't."""
+        mock_post.side_effect = [
+            self._pull_response({":block/uid": "abc123"}),
+            self._pull_response({":block/string": "test"}),
+            self._pull_response({}),
+            self._pull_response({}),
+        ]
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api.pull("123")
+        assert api.pull("123", "[:block/string]") == {":block/string": "test"}
+        api.pull("missing")
+        api.pull("missing")
+
+        assert mock_post.call_count == 4
+
+    @patch("mcp_server_roam.roam_api.PULL_CACHE_SIZE", 2)
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_pull_cache_evicts_oldest(self, mock_post: MagicMock) -> None:
+        """Test that the cache stays bounded by evicting the oldest entry."""
+        mock_post.return_value = self._pull_response({":block/uid": "abc123"})
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api.pull("1")
+        api.pull("2")
+        api.pull("3")
+
+        assert list(api._pull_cache) == [("2", "[*]"), ("3", "[*]")]
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_create_block_clears_pull_cache(self, mock_post: MagicMock) -> None:
+        """Test that writes invalidate cached pulls."""
+        mock_post.return_value = self._pull_response({":block/uid": "abc123"})
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api.pull("123")
+        api.create_block("Test content", page_uid="page-uid")
+        api.pull("123")
+
+        assert mock_post.call_count == 3
+
+
+class TestQueryCache:
+    """Tests for RoamAPI.run_query result caching."""
+
+    @staticmethod
+    def _query_response(rows: list[list[str]]) -> MagicMock:
+        """Build a successful query response."""
+        response = MagicMock()
+        response.ok = True
+        response.is_redirect = False
+        response.status_code = 200
+        response.json.return_value = {"result": rows}
+        return response
+
+    @patch("mcp_server_roam.roam_api.time.monotonic")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_query_cached_until_ttl_expires(
+        self, mock_post: MagicMock, mock_monotonic: MagicMock
+    ) -> None:
+        """Test that opted-in queries hit the cache until the TTL lapses."""
+        mock_post.return_value = self._query_response([["a"]])
+        mock_monotonic.side_effect = [0.0, 59.0, 61.0]
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api.run_query("[:find ?x]", args=["a"], cache=True)
+        assert api.run_query("[:find ?x]", args=["a"], cache=True) == [["a"]]
+        assert mock_post.call_count == 1
+
+        api.run_query("[:find ?x]", args=["a"], cache=True)
+        assert mock_post.call_count == 2
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_query_cache_keyed_by_args_and_opt_in(self, mock_post: MagicMock) -> None:
+        """Test that args are part of the key and uncached queries skip it."""
+        mock_post.return_value = self._query_response([["a"]])
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api.run_query("[:find ?x]", args=["a"], cache=True)
+        api.run_query("[:find ?x]", args=["b"], cache=True)
+        api.run_query("[:find ?x]", args=["a"])
+        api.run_query("[:find ?x]", args=["a"])
+
+        assert mock_post.call_count == 4
+        assert len(api._query_cache) == 2
+
+    @patch("mcp_server_roam.roam_api.time.monotonic")
+    @patch("mcp_server_roam.roam_api.json.dumps")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_uncached_query_skips_cache_key(
+        self, mock_post: MagicMock, mock_dumps: MagicMock, mock_monotonic: MagicMock
+    ) -> None:
+        """Test that uncached queries never serialize args or read the clock."""
+        mock_post.return_value = self._query_response([["a"]])
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        assert api.run_query("[:find ?x]", args=[["u1", "u2"]]) == [["a"]]
+
+        mock_dumps.assert_not_called()
+        mock_monotonic.assert_not_called()
+        assert api._query_cache == {}
+
+    @patch("mcp_server_roam.roam_api.QUERY_CACHE_SIZE", 2)
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_query_cache_evicts_oldest(self, mock_post: MagicMock) -> None:
+        """Test that the query cache stays bounded by evicting the oldest entry."""
+        mock_post.return_value = self._query_response([])
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        for query in ("[:find ?a]", "[:find ?b]", "[:find ?c]"):
+            api.run_query(query, cache=True)
+
+        assert list(api._query_cache) == [
+            ("[:find ?b]", "null"),
+            ("[:find ?c]", "null"),
+        ]
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_create_block_clears_query_cache(self, mock_post: MagicMock) -> None:
+        """Test that writes invalidate cached queries."""
+        mock_post.return_value = self._query_response([])
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api.run_query("[:find ?x]", cache=True)
+        api.create_block("Test content", page_uid="page-uid")
+        api.run_query("[:find ?x]", cache=True)
+
+        assert mock_post.call_count == 3
+
 
 class TestGetReferencesToPage:
     """Tests for RoamAPI.get_references_to_page method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_references_success(self, mock_post: MagicMock) -> None:
         """Test successful get references."""
         mock_response = MagicMock()
@@ -494,8 +1000,10 @@ class TestGetReferencesToPage:
         assert len(result) == 1
         assert result[0]["uid"] == "uid1"
         assert result[0]["string"] == "Block with [[Test Page]]"
+        query = mock_post.call_args.kwargs["json"]["query"]
+        assert '(clojure.string/includes? ?block-string "[[Test Page]]")' in query
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_references_with_max_results(self, mock_post: MagicMock) -> None:
         """Test get references with max_results limit."""
         mock_response = MagicMock()
@@ -516,7 +1024,7 @@ class TestGetReferencesToPage:
 
         assert len(result) == 2
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_references_api_error(self, mock_post: MagicMock) -> None:
         """Test get references returns empty list on error."""
         mock_response = MagicMock()
@@ -531,7 +1039,7 @@ class TestGetReferencesToPage:
 
         assert result == []
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_references_auth_error_reraises(self, mock_post: MagicMock) -> None:
         """Test get references re-raises AuthenticationError."""
         error_response = MagicMock()
@@ -558,7 +1066,7 @@ class TestGetReferencesToPage:
         assert "suspicious pattern" in str(exc_info.value)
 
     @patch("mcp_server_roam.roam_api.time.sleep")
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_references_rate_limit_returns_empty(
         self, mock_post: MagicMock, mock_sleep: MagicMock
     ) -> None:
@@ -580,15 +1088,9 @@ class TestGetReferencesToPage:
 class TestGetBlock:
     """Tests for RoamAPI.get_block method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_block_success(self, mock_post: MagicMock) -> None:
         """Test successful get block."""
-        query_response = MagicMock()
-        query_response.ok = True
-        query_response.is_redirect = False
-        query_response.status_code = 200
-        query_response.json.return_value = {"result": [[123]]}
-
         pull_response = MagicMock()
         pull_response.ok = True
         pull_response.is_redirect = False
@@ -597,15 +1099,34 @@ class TestGetBlock:
             "result": {":block/string": "test", ":block/uid": "abc123"}
         }
 
-        mock_post.side_effect = [query_response, pull_response]
+        mock_post.return_value = pull_response
 
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
         result = api.get_block("abc123")
 
         assert result[":block/string"] == "test"
         assert result[":block/uid"] == "abc123"
+        # Single round trip: pull through a lookup ref, no entity-id query
+        mock_post.assert_called_once()
+        body = mock_post.call_args.kwargs["json"]
+        assert mock_post.call_args.args[0].endswith("/pull")
+        assert body["eid"] == '[:block/uid "abc123"]'
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_get_block_not_found_null_result(self, mock_post: MagicMock) -> None:
+        """Test get block when the lookup ref pull returns null."""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.is_redirect = False
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"result": None}
+        mock_post.return_value = mock_response
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with pytest.raises(BlockNotFoundError):
+            api.get_block("missing")
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_block_not_found(self, mock_post: MagicMock) -> None:
         """Test get block when block not found."""
         mock_response = MagicMock()
@@ -624,15 +1145,9 @@ class TestGetBlock:
 class TestGetPage:
     """Tests for RoamAPI.get_page method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_page_success(self, mock_post: MagicMock) -> None:
         """Test successful get page."""
-        query_response = MagicMock()
-        query_response.ok = True
-        query_response.is_redirect = False
-        query_response.status_code = 200
-        query_response.json.return_value = {"result": [[123]]}
-
         pull_response = MagicMock()
         pull_response.ok = True
         pull_response.is_redirect = False
@@ -641,14 +1156,18 @@ class TestGetPage:
             "result": {":node/title": "Test Page", ":block/children": []}
         }
 
-        mock_post.side_effect = [query_response, pull_response]
+        mock_post.return_value = pull_response
 
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
         result = api.get_page("Test Page")
 
         assert result[":node/title"] == "Test Page"
+        mock_post.assert_called_once()
+        body = mock_post.call_args.kwargs["json"]
+        assert body["eid"] == '[:node/title "Test Page"]'
+        assert body["selector"] == "[* {:block/children ...}]"
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_page_not_found(self, mock_post: MagicMock) -> None:
         """Test get page when page not found."""
         mock_response = MagicMock()
@@ -667,7 +1186,7 @@ class TestGetPage:
 class TestCreateBlock:
     """Tests for RoamAPI.create_block method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_create_block_with_page_uid(self, mock_post: MagicMock) -> None:
         """Test create block with page UID."""
         mock_response = MagicMock()
@@ -682,7 +1201,7 @@ class TestCreateBlock:
 
         assert result["uid"] == "new-block-uid"
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_create_block_with_parent_uid(self, mock_post: MagicMock) -> None:
         """Test create block with parent UID."""
         mock_response = MagicMock()
@@ -697,38 +1216,36 @@ class TestCreateBlock:
 
         assert result["uid"] == "new-block-uid"
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_create_block_default_daily_notes(self, mock_post: MagicMock) -> None:
         """Test create block defaults to daily notes page."""
-        # First call: find daily note page
-        query_response1 = MagicMock()
-        query_response1.ok = True
-        query_response1.is_redirect = False
-        query_response1.status_code = 200
-        query_response1.json.return_value = {"result": [[123]]}
-
-        # Second call: get daily note UID
-        query_response2 = MagicMock()
-        query_response2.ok = True
-        query_response2.is_redirect = False
-        query_response2.status_code = 200
-        query_response2.json.return_value = {"result": [["daily-uid"]]}
-
-        # Third call: create block
+        # First call: resolve the daily note UID in one query
+        query_response = MagicMock()
+        query_response.ok = True
+        query_response.is_redirect = False
+        query_response.status_code = 200
+        query_response.json.return_value = {"result": [["daily-uid"]]}
+
+        # Second call: create block
         create_response = MagicMock()
         create_response.ok = True
         create_response.is_redirect = False
         create_response.status_code = 200
         create_response.json.return_value = {"uid": "new-block-uid"}
 
-        mock_post.side_effect = [query_response1, query_response2, create_response]
+        mock_post.side_effect = [query_response, create_response]
 
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
         result = api.create_block("Test content")
 
         assert result["uid"] == "new-block-uid"
+        assert mock_post.call_count == 2
+        lookup_body = mock_post.call_args_list[0].kwargs["json"]
+        assert lookup_body["args"] == [datetime.now().strftime("%m-%d-%Y")]
+        write_body = mock_post.call_args.kwargs["json"]
+        assert write_body["location"]["parent-uid"] == "daily-uid"
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_create_block_daily_note_not_found(self, mock_post: MagicMock) -> None:
         """Test error when daily notes page not found."""
         mock_response = MagicMock()
@@ -743,35 +1260,91 @@ class TestCreateBlock:
             api.create_block("Test content")
         assert "Daily Notes page" in str(exc_info.value)
 
-    @patch("mcp_server_roam.roam_api.requests.post")
-    def test_create_block_daily_uid_not_found(self, mock_post: MagicMock) -> None:
-        """Test error when daily notes UID not found."""
-        # First call finds the page
-        query_response1 = MagicMock()
-        query_response1.ok = True
-        query_response1.is_redirect = False
-        query_response1.status_code = 200
-        query_response1.json.return_value = {"result": [[123]]}
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_create_block_reuses_daily_page_uid(self, mock_post: MagicMock) -> None:
+        """Test that the daily page UID is resolved once across writes."""
+        query_response = MagicMock()
+        query_response.ok = True
+        query_response.is_redirect = False
+        query_response.status_code = 200
+        query_response.json.return_value = {"result": [["daily-uid"]]}
 
-        # Second call returns empty (no UID)
-        query_response2 = MagicMock()
-        query_response2.ok = True
-        query_response2.is_redirect = False
-        query_response2.status_code = 200
-        query_response2.json.return_value = {"result": []}
+        create_response = MagicMock()
+        create_response.ok = True
+        create_response.is_redirect = False
+        create_response.status_code = 200
+        create_response.json.return_value = {"uid": "new-block-uid"}
 
-        mock_post.side_effect = [query_response1, query_response2]
+        mock_post.side_effect = [query_response, create_response, create_response]
 
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
-        with pytest.raises(BlockNotFoundError) as exc_info:
+        api.create_block("First")
+        api.create_block("Second")
+
+        # One lookup, then two writes
+        assert mock_post.call_count == 3
+        write_body = mock_post.call_args.kwargs["json"]
+        assert write_body["location"]["parent-uid"] == "daily-uid"
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_create_block_failed_write_forgets_page_uid(
+        self, mock_post: MagicMock
+    ) -> None:
+        """Test that a failed write drops the cached daily page UID."""
+        query_response = MagicMock()
+        query_response.ok = True
+        query_response.is_redirect = False
+        query_response.status_code = 200
+        query_response.json.return_value = {"result": [["daily-uid"]]}
+
+        error_response = MagicMock()
+        error_response.ok = False
+        error_response.is_redirect = False
+        error_response.status_code = 400
+        error_response.text = "Bad Request"
+
+        mock_post.side_effect = [query_response, error_response]
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with pytest.raises(RoamAPIError):
             api.create_block("Test content")
-        assert "Could not find UID" in str(exc_info.value)
+
+        assert api._page_uid_cache == {}
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_create_block_failed_write_with_page_uid(
+        self, mock_post: MagicMock
+    ) -> None:
+        """Test that a failed write to an explicit page propagates."""
+        error_response = MagicMock()
+        error_response.ok = False
+        error_response.is_redirect = False
+        error_response.status_code = 400
+        error_response.text = "Bad Request"
+        mock_post.return_value = error_response
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        with pytest.raises(RoamAPIError):
+            api.create_block("Test content", page_uid="page-uid")
+
+    def test_get_page_uid_evicts_oldest(self) -> None:
+        """Test that the page UID cache stays bounded."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with (
+            patch("mcp_server_roam.roam_api.PAGE_UID_CACHE_SIZE", 2),
+            patch.object(api, "run_query", side_effect=[[["a"]], [["b"]], [["c"]]]),
+        ):
+            for title in ("A", "B", "C"):
+                api._get_page_uid(title)
+
+        assert api._page_uid_cache == {"B": "b", "C": "c"}
 
 
 class TestFindDailyNoteFormat:
     """Tests for RoamAPI.find_daily_note_format method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_find_format_cached(self, mock_post: MagicMock) -> None:
         """Test that cached format is returned without API calls."""
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
@@ -782,15 +1355,15 @@ class TestFindDailyNoteFormat:
         assert result == "%B %d, %Y"
         mock_post.assert_not_called()
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_find_format_first_match(self, mock_post: MagicMock) -> None:
-        """Test finding format on first try."""
-        # First format succeeds
+        """Test finding format with a single batched query."""
+        today_title = datetime.now().strftime("%B %d, %Y")
         mock_response = MagicMock()
         mock_response.ok = True
         mock_response.is_redirect = False
         mock_response.status_code = 200
-        mock_response.json.return_value = {"result": [[123]]}
+        mock_response.json.return_value = {"result": [[today_title]]}
         mock_post.return_value = mock_response
 
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
@@ -798,24 +1371,25 @@ class TestFindDailyNoteFormat:
 
         assert result == "%B %d, %Y"
         assert api._daily_note_format == "%B %d, %Y"
+        # Every candidate title is probed in one roundtrip
+        mock_post.assert_called_once()
+        body = mock_post.call_args.kwargs["json"]
+        assert ":in $ [?title ...]" in body["query"]
+        titles = body["args"][0]
+        assert today_title in titles
+        assert datetime.now().strftime("%Y-%m-%d") in titles
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_find_format_ordinal(self, mock_post: MagicMock) -> None:
         """Test finding ordinal format like 'June 13th, 2025'."""
-        # First format fails, second succeeds (ordinal)
-        fail_response = MagicMock()
-        fail_response.ok = True
-        fail_response.is_redirect = False
-        fail_response.status_code = 200
-        fail_response.json.return_value = {"result": []}
-
+        today = datetime.now()
+        ordinal_title = today.strftime(f"%B %d{ordinal_suffix(today.day)}, %Y")
         success_response = MagicMock()
         success_response.ok = True
         success_response.is_redirect = False
         success_response.status_code = 200
-        success_response.json.return_value = {"result": [[123]]}
-
-        mock_post.side_effect = [fail_response, success_response]
+        success_response.json.return_value = {"result": [[ordinal_title]]}
+        mock_post.return_value = success_response
 
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
         result = api.find_daily_note_format()
@@ -823,7 +1397,26 @@ class TestFindDailyNoteFormat:
         # Now returns "ordinal" marker instead of fake strftime pattern
         assert result == "ordinal"
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_find_format_prefers_priority_order(self, mock_post: MagicMock) -> None:
+        """Test that the highest-priority format wins when several match."""
+        today = datetime.now()
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.is_redirect = False
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "result": [[today.strftime("%Y-%m-%d")], [today.strftime("%m-%d-%Y")]]
+        }
+        mock_post.return_value = mock_response
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        result = api.find_daily_note_format()
+
+        # "%m-%d-%Y" comes before "%Y-%m-%d" in DAILY_NOTE_FORMATS
+        assert result == "%m-%d-%Y"
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_find_format_no_match(self, mock_post: MagicMock) -> None:
         """Test fallback when no format matches."""
         mock_response = MagicMock()
@@ -839,7 +1432,7 @@ class TestFindDailyNoteFormat:
         # Should fall back to default
         assert result == "%m-%d-%Y"
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_find_format_exception_continues(self, mock_post: MagicMock) -> None:
         """Test that exceptions during format detection are handled."""
 
@@ -859,7 +1452,7 @@ class TestFindDailyNoteFormat:
             resp.text = "Internal Server Error"
             return resp
 
-        # First call returns server error, rest return empty
+        # Detection query returns server error
         mock_post.side_effect = [create_error_response()] + [
             create_empty_response() for _ in range(15)
         ]
@@ -867,10 +1460,10 @@ class TestFindDailyNoteFormat:
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
         result = api.find_daily_note_format()
 
-        # Should fall back to default after all attempts
+        # Should fall back to default
         assert result == "%m-%d-%Y"
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_find_format_auth_error_reraises(self, mock_post: MagicMock) -> None:
         """Test that AuthenticationError during format detection is re-raised."""
         error_response = MagicMock()
@@ -886,11 +1479,23 @@ class TestFindDailyNoteFormat:
 
         assert "Authentication error (HTTP 401)" in str(exc_info.value)
 
+    def test_find_format_unexpected_error_propagates(self) -> None:
+        """Test that non-API errors are not swallowed as a failed detection."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with (
+            patch.object(api, "run_query", side_effect=ValueError("bug")),
+            pytest.raises(ValueError, match="bug"),
+        ):
+            api.find_daily_note_format()
+
+        assert api._daily_note_format is None
+
 
 class TestGetDailyNotesContext:
     """Tests for RoamAPI.get_daily_notes_context method."""
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_context_with_content(self, mock_post: MagicMock) -> None:
         """Test getting daily notes context with content."""
         # Mock format detection (first call)
@@ -900,25 +1505,26 @@ class TestGetDailyNotesContext:
         format_response.status_code = 200
         format_response.json.return_value = {"result": [[123]]}
 
-        # Mock page query response
-        page_query_response = MagicMock()
-        page_query_response.ok = True
-        page_query_response.is_redirect = False
-        page_query_response.status_code = 200
-        page_query_response.json.return_value = {"result": [[456]]}
+        # Detection finds no match, so today's title uses the default format
+        today = datetime.now().strftime("%m-%d-%Y")
 
-        # Mock page pull response
+        # Mock batched page pull response
         page_pull_response = MagicMock()
         page_pull_response.ok = True
         page_pull_response.is_redirect = False
         page_pull_response.status_code = 200
         page_pull_response.json.return_value = {
-            "result": {
-                ":node/title": "December 15, 2025",
-                ":block/children": [
-                    {":block/string": "Test note", ":block/uid": "uid1"}
-                ],
-            }
+            "result": [
+                [
+                    today,
+                    {
+                        ":node/title": today,
+                        ":block/children": [
+                            {":block/string": "Test note", ":block/uid": "uid1"}
+                        ],
+                    },
+                ]
+            ]
         }
 
         # Mock references query
@@ -927,12 +1533,11 @@ class TestGetDailyNotesContext:
         refs_response.is_redirect = False
         refs_response.status_code = 200
         refs_response.json.return_value = {
-            "result": [["ref-uid", "Reference to [[December 15, 2025]]"]]
+            "result": [[f"[[{today}]]", "ref-uid", f"Reference to [[{today}]]"]]
         }
 
         mock_post.side_effect = [
             format_response,
-            page_query_response,
             page_pull_response,
             refs_response,
         ]
@@ -942,8 +1547,9 @@ class TestGetDailyNotesContext:
 
         assert "Daily Notes Context" in result
         assert "Test note" in result
+        assert f"### References to {today} (1 found)" in result
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_context_page_not_found(self, mock_post: MagicMock) -> None:
         """Test handling when daily note page not found."""
         # Mock format detection
@@ -967,7 +1573,7 @@ class TestGetDailyNotesContext:
 
         assert "No daily notes found" in result
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_context_ordinal_format(self, mock_post: MagicMock) -> None:
         """Test getting context with ordinal date format."""
         # Set cached format to ordinal
@@ -987,26 +1593,20 @@ class TestGetDailyNotesContext:
 
         assert "No daily notes found" in result
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_context_empty_children(self, mock_post: MagicMock) -> None:
         """Test context when page has empty children list."""
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
         api._daily_note_format = "%B %d, %Y"
 
-        # Mock page query response
-        page_query_response = MagicMock()
-        page_query_response.ok = True
-        page_query_response.is_redirect = False
-        page_query_response.status_code = 200
-        page_query_response.json.return_value = {"result": [[456]]}
-
         # Mock page pull with empty children
         page_pull_response = MagicMock()
         page_pull_response.ok = True
         page_pull_response.is_redirect = False
         page_pull_response.status_code = 200
+        today = datetime.now().strftime("%B %d, %Y")
         page_pull_response.json.return_value = {
-            "result": {":node/title": "December 15, 2025", ":block/children": []}
+            "result": [[today, {":node/title": today, ":block/children": []}]]
         }
 
         # Mock empty references
@@ -1016,36 +1616,37 @@ class TestGetDailyNotesContext:
         refs_response.status_code = 200
         refs_response.json.return_value = {"result": []}
 
-        mock_post.side_effect = [page_query_response, page_pull_response, refs_response]
+        mock_post.side_effect = [page_pull_response, refs_response]
 
         result = api.get_daily_notes_context(days=1, max_references=10)
 
         # Page found but no content - should return "No daily notes found"
         assert "No daily notes found" in result
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_context_empty_block_strings(self, mock_post: MagicMock) -> None:
         """Test context when page has children with empty strings."""
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
         api._daily_note_format = "%B %d, %Y"
 
-        # Mock page query response
-        page_query_response = MagicMock()
-        page_query_response.ok = True
-        page_query_response.is_redirect = False
-        page_query_response.status_code = 200
-        page_query_response.json.return_value = {"result": [[456]]}
-
         # Mock page with children that have empty strings
         page_pull_response = MagicMock()
         page_pull_response.ok = True
         page_pull_response.is_redirect = False
         page_pull_response.status_code = 200
+        today = datetime.now().strftime("%B %d, %Y")
         page_pull_response.json.return_value = {
-            "result": {
-                ":node/title": "December 15, 2025",
-                ":block/children": [{":block/string": "", ":block/uid": "uid1"}],
-            }
+            "result": [
+                [
+                    today,
+                    {
+                        ":node/title": today,
+                        ":block/children": [
+                            {":block/string": "", ":block/uid": "uid1"}
+                        ],
+                    },
+                ]
+            ]
         }
 
         # Mock empty references
@@ -1055,38 +1656,37 @@ class TestGetDailyNotesContext:
         refs_response.status_code = 200
         refs_response.json.return_value = {"result": []}
 
-        mock_post.side_effect = [page_query_response, page_pull_response, refs_response]
+        mock_post.side_effect = [page_pull_response, refs_response]
 
         result = api.get_daily_notes_context(days=1, max_references=10)
 
         # Empty strings produce no markdown, no references - no daily notes
         assert "No daily notes found" in result
 
-    @patch("mcp_server_roam.roam_api.requests.post")
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
     def test_get_context_no_references(self, mock_post: MagicMock) -> None:
         """Test context when page has content but no references."""
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
         api._daily_note_format = "%B %d, %Y"
 
-        # Mock page query response
-        page_query_response = MagicMock()
-        page_query_response.ok = True
-        page_query_response.is_redirect = False
-        page_query_response.status_code = 200
-        page_query_response.json.return_value = {"result": [[456]]}
-
         # Mock page with actual content
         page_pull_response = MagicMock()
         page_pull_response.ok = True
         page_pull_response.is_redirect = False
         page_pull_response.status_code = 200
+        today = datetime.now().strftime("%B %d, %Y")
         page_pull_response.json.return_value = {
-            "result": {
-                ":node/title": "December 15, 2025",
-                ":block/children": [
-                    {":block/string": "Some content", ":block/uid": "uid1"}
-                ],
-            }
+            "result": [
+                [
+                    today,
+                    {
+                        ":node/title": today,
+                        ":block/children": [
+                            {":block/string": "Some content", ":block/uid": "uid1"}
+                        ],
+                    },
+                ]
+            ]
         }
 
         # Mock empty references
@@ -1096,7 +1696,7 @@ class TestGetDailyNotesContext:
         refs_response.status_code = 200
         refs_response.json.return_value = {"result": []}
 
-        mock_post.side_effect = [page_query_response, page_pull_response, refs_response]
+        mock_post.side_effect = [page_pull_response, refs_response]
 
         result = api.get_daily_notes_context(days=1, max_references=10)
 
@@ -1105,10 +1705,133 @@ class TestGetDailyNotesContext:
         assert "Some content" in result
         assert "References to" not in result
 
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_get_context_multiple_days_keeps_order(self, mock_post: MagicMock) -> None:
+        """Test that batched days are returned newest first."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api._daily_note_format = "%Y-%m-%d"
+        today = datetime.now()
+        titles = [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(3)]
+
+        def respond(url: str, **kwargs: object) -> MagicMock:
+            body = kwargs["json"]
+            response = MagicMock()
+            response.ok = True
+            response.is_redirect = False
+            response.status_code = 200
+            if "pull" in body["query"]:  # type: ignore[index]
+                # Rows come back in no particular order
+                response.json.return_value = {
+                    "result": [
+                        [
+                            title,
+                            {
+                                ":node/title": title,
+                                ":block/children": [
+                                    {
+                                        ":block/string": f"note for {title}",
+                                        ":block/uid": "u",
+                                    }
+                                ],
+                            },
+                        ]
+                        for title in reversed(titles)
+                    ]
+                }
+            else:
+                response.json.return_value = {"result": []}
+            return response
+
+        mock_post.side_effect = respond
+
+        result = api.get_daily_notes_context(days=3, max_references=10)
+
+        positions = [result.index(f"note for {title}") for title in titles]
+        assert positions == sorted(positions)
+        # Sections follow the header and each other with a blank line between
+        assert result.startswith(f"# Daily Notes Context\n\n## {titles[0]}\n")
+        assert result.count("\n\n## ") == 3
+        # One batched page pull plus one batched references query
+        assert mock_post.call_count == 2
+        pages_body = mock_post.call_args_list[0].kwargs["json"]
+        assert pages_body["args"] == [titles]
+        refs_body = mock_post.call_args_list[-1].kwargs["json"]
+        assert refs_body["args"] == [[f"[[{title}]]" for title in titles]]
+
+    def test_get_references_to_pages_groups_and_caps(self) -> None:
+        """Test that batched backlinks are bucketed per title and capped."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        rows = [
+            ["[[Day A]]", "u1", "first [[Day A]]"],
+            ["[[Day B]]", "u2", "only [[Day B]]"],
+            ["[[Day A]]", "u3", "second [[Day A]]"],
+        ]
+
+        with patch.object(api, "run_query", return_value=rows) as mock_query:
+            refs = api._get_references_to_pages(
+                ["Day A", "Day B", "Day C"], max_results=1
+            )
+
+        assert refs == {
+            "Day A": [{"uid": "u1", "string": "first [[Day A]]"}],
+            "Day B": [{"uid": "u2", "string": "only [[Day B]]"}],
+            "Day C": [],
+        }
+        assert mock_query.call_count == 1
+        assert mock_query.call_args.kwargs["args"] == [
+            ["[[Day A]]", "[[Day B]]", "[[Day C]]"]
+        ]
+
+    def test_get_references_to_pages_recoverable_error(self) -> None:
+        """Test that recoverable errors leave every title with no references."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(api, "run_query", side_effect=RateLimitError("slow down")):
+            refs = api._get_references_to_pages(["Day A", "Day B"])
+
+        assert refs == {"Day A": [], "Day B": []}
+
+    def test_get_references_to_pages_auth_error_raised(self) -> None:
+        """Test that authentication errors propagate."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with (
+            patch.object(api, "run_query", side_effect=AuthenticationError("bad")),
+            pytest.raises(AuthenticationError),
+        ):
+            api._get_references_to_pages(["Day A"])
+
+    def test_get_context_zero_days(self) -> None:
+        """Test that zero days returns the empty message without requests."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api._daily_note_format = "%Y-%m-%d"
+
+        result = api.get_daily_notes_context(days=0)
+
+        assert "No daily notes found" in result
+
 
 class TestProcessBlocks:
     """Tests for RoamAPI.process_blocks method."""
 
+    def test_iter_blocks_yields_fragments(self) -> None:
+        """Test that the fragment generator matches process_blocks output."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        blocks = [
+            {
+                ":block/string": "See [[Page]]",
+                ":block/children": [{":block/string": "child"}],
+            },
+            {":block/string": ""},
+        ]
+        links: set[str] = set()
+
+        fragments = list(api._iter_blocks(blocks, linked_pages=links))
+
+        assert fragments == ["- ", "See [[Page]]", "\n", "  - ", "child", "\n"]
+        assert "".join(fragments) == api.process_blocks(blocks)
+        assert links == {"Page"}
+
     def test_process_simple_blocks(self) -> None:
         """Test processing simple blocks."""
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
@@ -1122,6 +1845,38 @@ class TestProcessBlocks:
         assert "- First block\n" in result
         assert "- Second block\n" in result
 
+    def test_process_preserves_depth_first_order(self) -> None:
+        """Test that siblings and children come out in outline order."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        blocks = [
+            {
+                ":block/string": "A",
+                ":block/children": [
+                    {":block/string": "A1"},
+                    {":block/string": "", ":block/children": [{":block/string": "X"}]},
+                    {":block/string": "A2"},
+                ],
+            },
+            {":block/string": "B"},
+        ]
+
+        result = api.process_blocks(blocks, depth=1)
+
+        # Empty blocks are dropped along with their children
+        assert result == "  - A\n    - A1\n    - A2\n  - B\n"
+
+    def test_process_very_deep_outline(self) -> None:
+        """Test that nesting deeper than the recursion limit is handled."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        block: dict[str, Any] = {":block/string": "leaf"}
+        for i in range(5000):
+            block = {":block/string": f"level {i}", ":block/children": [block]}
+
+        result = api.process_blocks([block])
+
+        assert result.count("\n") == 5001
+        assert result.endswith(" " * 10000 + "- leaf\n")
+
     def test_process_nested_blocks(self) -> None:
         """Test processing nested blocks."""
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
@@ -1251,6 +2006,8 @@ class TestBulkFetchMethods:
             }
             assert blocks[1]["uid"] == "uid2"
             mock_query.assert_called_once()
+            # Empty blocks are filtered out by the engine, not in Python
+            assert '[(not= ?string "")]' in mock_query.call_args[0][0]
 
     def test_get_blocks_for_sync_empty(self) -> None:
         """Test fetching all blocks when none exist."""
@@ -1273,9 +2030,25 @@ class TestBulkFetchMethods:
 
             assert len(blocks) == 1
             assert blocks[0]["uid"] == "uid1"
-            # Verify the query includes the timestamp filter
+            # Verify the timestamp is bound as a query input, not inlined
             query_arg = mock_query.call_args[0][0]
-            assert "1500" in query_arg
+            assert ":in $ ?since" in query_arg
+            assert "(> ?edit-time ?since)" in query_arg
+            assert "1500" not in query_arg
+            assert mock_query.call_args.kwargs["args"] == [1500]
+            # Cleared blocks must still come back so their entries update
+            assert "not=" not in query_arg
+
+    def test_get_blocks_for_sync_coerces_float_timestamp(self) -> None:
+        """Test that a float timestamp is bound as an integer."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(api, "run_query", return_value=[]) as mock_query:
+            api.get_blocks_for_sync(since_timestamp=1.7e12)  # type: ignore[arg-type]
+
+        (bound,) = mock_query.call_args.kwargs["args"]
+        assert bound == 1_700_000_000_000
+        assert type(bound) is int
 
     def test_get_blocks_for_sync_since_timestamp_empty(self) -> None:
         """Test fetching modified blocks when none exist."""
@@ -1285,14 +2058,176 @@ class TestBulkFetchMethods:
             blocks = api.get_blocks_for_sync(since_timestamp=1500)
             assert blocks == []
 
+    def test_get_blocks_since_cursor_advances(self) -> None:
+        """Test that the cursor moves to the newest edit time returned."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        mock_results = [
+            ["uid1", "content 1", 3000, "page-uid-1", "Page 1"],
+            ["uid2", "content 2", 2000, "page-uid-2", "Page 2"],
+        ]
+
+        with patch.object(api, "run_query", return_value=mock_results) as mock_query:
+            blocks, cursor = api.get_blocks_since_cursor(1500)
+
+        assert [b["uid"] for b in blocks] == ["uid1", "uid2"]
+        assert cursor == 3000
+        assert "(> ?edit-time ?since)" in mock_query.call_args[0][0]
+        assert mock_query.call_args.kwargs["args"] == [1500]
+
+    def test_get_blocks_since_cursor_unchanged(self) -> None:
+        """Test that the cursor is kept when nothing changed."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(api, "run_query", return_value=[]) as mock_query:
+            blocks, cursor = api.get_blocks_since_cursor(1500, inclusive=True)
+
+        assert blocks == []
+        assert cursor == 1500
+        assert "(>= ?edit-time ?since)" in mock_query.call_args[0][0]
+
+    def test_get_blocks_for_sync_columnar(self) -> None:
+        """Test fetching sync blocks as per-field columns."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        mock_results = [
+            ["uid1", "content 1", 1000, "page-uid-1", "Page 1"],
+            ["uid2", "content 2", 2000, "page-uid-2", "Page 2"],
+        ]
+
+        with patch.object(api, "run_query", return_value=mock_results) as mock_query:
+            columns = api.get_blocks_for_sync_columnar(since_timestamp=500)
+
+        assert columns["uid"] == ["uid1", "uid2"]
+        assert columns["content"] == ["content 1", "content 2"]
+        assert columns["edit_time"] == array("q", [1000, 2000])
+        assert columns["page_uid"] == ["page-uid-1", "page-uid-2"]
+        assert columns["page_title"] == ["Page 1", "Page 2"]
+        assert mock_query.call_args.kwargs["args"] == [500]
+
+    def test_get_blocks_for_sync_columnar_empty(self) -> None:
+        """Test columnar fetch when no blocks exist."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(api, "run_query", return_value=[]):
+            columns = api.get_blocks_for_sync_columnar()
+
+        assert columns["uid"] == []
+        assert columns["edit_time"] == array("q")
+        assert all(len(column) == 0 for column in columns.values())
+
+    def test_rows_to_sync_blocks_shares_page_strings(self) -> None:
+        """Test that repeated page uids and titles share one string object."""
+        rows = json.loads(
+            '[["uid1", "a", 1, "page-uid", "Long Page Title"],'
+            ' ["uid2", "b", 2, "page-uid", "Long Page Title"]]'
+        )
+        assert rows[0][4] is not rows[1][4]
+
+        blocks = RoamAPI._rows_to_sync_blocks(rows)
+
+        assert blocks[0]["page_uid"] is blocks[1]["page_uid"]
+        assert blocks[0]["page_title"] is blocks[1]["page_title"]
+        assert blocks[1]["page_title"] == "Long Page Title"
+
+    def test_get_block_records_for_sync(self) -> None:
+        """Test fetching sync blocks as slotted records."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        mock_results = [["uid1", "content 1", 1000, "page-uid-1", "Page 1"]]
+        with patch.object(api, "run_query", return_value=mock_results) as mock_query:
+            records = api.get_block_records_for_sync(since_timestamp=500)
+
+        assert records == [
+            BlockRecord("uid1", "content 1", 1000, "page-uid-1", "Page 1")
+        ]
+        assert records[0].to_dict() == api._rows_to_sync_blocks(mock_results)[0]
+        assert not hasattr(records[0], "__dict__")
+        assert mock_query.call_args.kwargs["args"] == [500]
+
+    def test_iter_blocks_for_sync_windows(self) -> None:
+        """Test that the edit-time range is split into max_windows windows."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        def fake_query(query: str, args: list[Any] | None = None) -> list[Any]:
+            if args is None:
+                return [[1000, 3500]]
+            start, end = args
+            rows = [
+                ["uid1", "First", 1000, "page1", "Page One"],
+                ["uid2", "Second", 3500, "page1", "Page One"],
+            ]
+            return [row for row in rows if start <= row[2] < end]
+
+        with patch.object(api, "run_query", side_effect=fake_query) as mock_query:
+            batches = list(api.iter_blocks_for_sync(max_windows=3, min_window_ms=1))
+
+        assert [[b["uid"] for b in batch] for batch in batches] == [["uid1"], ["uid2"]]
+        assert batches[0][0]["page_title"] == "Page One"
+        windows = [c.kwargs["args"] for c in mock_query.call_args_list[1:]]
+        # 2501ms split three ways; the empty middle window is queried but
+        # not yielded
+        assert windows == [[1000, 1834], [1834, 2668], [2668, 3502]]
+        assert ":in $ ?start ?end" in mock_query.call_args[0][0]
+
+    @pytest.mark.parametrize("bounds", [[], [[None, None]]])
+    def test_iter_blocks_for_sync_empty_graph(self, bounds: list[Any]) -> None:
+        """Test that an empty graph yields nothing after the range query."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(api, "run_query", return_value=bounds) as mock_query:
+            assert list(api.iter_blocks_for_sync()) == []
+
+        assert mock_query.call_count == 1
+
+    def test_iter_blocks_for_sync_old_graph_stays_under_rate_limit(self) -> None:
+        """Test that a decade of edits still takes at most SYNC_MAX_WINDOWS."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        ten_years_ms = 10 * 365 * 24 * 60 * 60 * 1000
+
+        with patch.object(
+            api, "run_query", side_effect=[[[0, ten_years_ms]]] + [[]] * 100
+        ) as mock_query:
+            assert list(api.iter_blocks_for_sync()) == []
+
+        assert mock_query.call_count == 1 + SYNC_MAX_WINDOWS
+
+    def test_iter_blocks_for_sync_young_graph_uses_min_window(self) -> None:
+        """Test that a short edit-time range is fetched in one window."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(
+            api, "run_query", side_effect=[[[0, 60_000]], []]
+        ) as mock_query:
+            list(api.iter_blocks_for_sync())
+
+        assert mock_query.call_count == 2
+        assert mock_query.call_args.kwargs["args"] == [0, SYNC_MIN_WINDOW_MS]
+
+    @pytest.mark.parametrize(
+        ("kwargs", "message"),
+        [
+            ({"max_windows": 0}, "max_windows must be positive"),
+            ({"min_window_ms": 0}, "min_window_ms must be positive"),
+        ],
+    )
+    def test_iter_blocks_for_sync_rejects_bad_window(
+        self, kwargs: dict[str, int], message: str
+    ) -> None:
+        """Test that non-positive window settings are rejected before querying."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with pytest.raises(ValueError, match=message):
+            next(api.iter_blocks_for_sync(**kwargs))
+
     def test_get_block_parent_chain_success(self) -> None:
         """Test fetching parent chain for a block."""
         api = RoamAPI(api_token="test-token", graph_name="test-graph")
 
         mock_results = [
-            ["Parent 1", 0],
-            ["Parent 2", 1],
-            ["Parent 3", 2],
+            ["block-uid", "Parent 3", 2],
+            ["block-uid", "Parent 1", 0],
+            ["block-uid", "Parent 2", 1],
         ]
 
         with patch.object(api, "run_query", return_value=mock_results):
@@ -1317,6 +2252,131 @@ class TestBulkFetchMethods:
             chain = api.get_block_parent_chain("block-uid")
             assert chain == []
 
+        # Failures are not memoized
+        assert api._parent_chain_cache == {}
+
+    def test_get_block_parent_chain_memoized(self) -> None:
+        """Test that repeat lookups reuse the memoized chain."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(
+            api, "run_query", return_value=[["block-uid", "Parent 1", 0]]
+        ) as mock_query:
+            first = api.get_block_parent_chain("block-uid")
+            first.append("mutated")
+            second = api.get_block_parent_chain("block-uid")
+
+        assert second == ["Parent 1"]
+        assert mock_query.call_count == 1
+
+    def test_get_block_parent_chain_invalidated_by_sync(self) -> None:
+        """Test that a non-empty sync fetch invalidates memoized chains."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(api, "run_query") as mock_query:
+            mock_query.return_value = [["block-uid", "Parent 1", 0]]
+            api.get_block_parent_chain("block-uid")
+            mock_query.return_value = []
+            api.get_blocks_for_sync(since_timestamp=1500)
+            mock_query.return_value = [["block-uid", "Parent 1", 0]]
+            api.get_block_parent_chain("block-uid")
+            mock_query.return_value = [["uid", "text", 2000, "p", "Page"]]
+            api.get_blocks_for_sync(since_timestamp=1500)
+            mock_query.return_value = [["block-uid", "Parent 2", 0]]
+            chain = api.get_block_parent_chain("block-uid")
+
+        assert chain == ["Parent 2"]
+        assert mock_query.call_count == 4
+
+    @patch("mcp_server_roam.roam_api.requests.Session.post")
+    def test_create_block_invalidates_parent_chains(self, mock_post: MagicMock) -> None:
+        """Test that writes invalidate memoized parent chains."""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.is_redirect = False
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"result": [["block-uid", "Parent 1", 0]]}
+        mock_post.return_value = mock_response
+
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+        api.get_block_parent_chain("block-uid")
+        api.create_block("Test content", page_uid="page-uid")
+        api.get_block_parent_chain("block-uid")
+
+        assert mock_post.call_count == 3
+
+    @patch("mcp_server_roam.roam_api.PARENT_CHAIN_CACHE_SIZE", 2)
+    def test_get_block_parent_chain_cache_evicts_oldest(self) -> None:
+        """Test that the memo stays bounded by evicting the oldest entry."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(api, "run_query", return_value=[]):
+            api.get_block_parent_chain("1")
+            api.get_block_parent_chain("2")
+            api.get_block_parent_chain("3")
+
+        assert list(api._parent_chain_cache) == [("2", 0), ("3", 0)]
+
+    def test_get_block_parent_chain_skips_stale_store(self) -> None:
+        """Test that a chain fetched across a graph change is not memoized."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        def query_during_write(query: str, args: list[Any]) -> list[list[Any]]:
+            api._bump_graph_version()
+            return [["block-uid", "Parent 1", 0]]
+
+        with patch.object(api, "run_query", side_effect=query_during_write):
+            chain = api.get_block_parent_chain("block-uid")
+
+        assert chain == ["Parent 1"]
+        assert api._parent_chain_cache == {}
+
+    def test_get_block_parent_chains_batched(self) -> None:
+        """Test that many chains are fetched in one query binding all UIDs."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        mock_results = [
+            ["uid-a", "A parent 2", 1],
+            ["uid-b", "B parent", 0],
+            ["uid-a", "A parent 1", 0],
+        ]
+        with patch.object(api, "run_query", return_value=mock_results) as mock_query:
+            chains = api.get_block_parent_chains(["uid-a", "uid-b", "uid-a", "uid-c"])
+
+        assert chains == {
+            "uid-a": ["A parent 1", "A parent 2"],
+            "uid-b": ["B parent"],
+            "uid-c": [],
+        }
+        assert mock_query.call_count == 1
+        assert ":in $ [?uid ...]" in mock_query.call_args[0][0]
+        assert mock_query.call_args.kwargs["args"] == [["uid-a", "uid-b", "uid-c"]]
+
+    def test_get_block_parent_chains_only_queries_misses(self) -> None:
+        """Test that memoized chains are served without re-querying."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(
+            api, "run_query", return_value=[["uid-a", "A parent", 0]]
+        ) as mock_query:
+            api.get_block_parent_chains(["uid-a"])
+            mock_query.return_value = []
+            chains = api.get_block_parent_chains(["uid-a", "uid-b"])
+            api.get_block_parent_chains(["uid-a", "uid-b"])
+
+        assert chains == {"uid-a": ["A parent"], "uid-b": []}
+        assert mock_query.call_count == 2
+        assert mock_query.call_args.kwargs["args"] == [["uid-b"]]
+
+    def test_get_block_parent_chains_empty_input(self) -> None:
+        """Test that an empty UID list skips the query entirely."""
+        api = RoamAPI(api_token="test-token", graph_name="test-graph")
+
+        with patch.object(api, "run_query") as mock_query:
+            assert api.get_block_parent_chains([]) == {}
+
+        mock_query.assert_not_called()
+
 
 class TestSearchBlocksByText:
     """Tests for search_blocks_by_text method."""
@@ -1496,13 +2556,15 @@ class TestGetBlockSiblings:
 
         with patch.object(
             api, "run_query", side_effect=[parent_result, siblings_result]
-        ):
+        ) as mock_query:
             siblings = api.get_block_siblings("block-uid", count=1)
 
             assert len(siblings["before"]) == 1
             assert siblings["before"][0]["content"] == "Sibling 2"
             assert len(siblings["after"]) == 1
             assert siblings["after"][0]["content"] == "Sibling 3"
+            # The server-provided parent UID is bound, not interpolated
+            assert mock_query.call_args.kwargs["args"] == ["parent-uid"]
 
     def test_get_siblings_no_parent(self) -> None:
         """Test fetching siblings when block has no parent."""
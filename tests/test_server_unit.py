@@ -4,6 +4,7 @@ These tests use pytest-mock to mock external dependencies (RoamAPI) and ensure
 fast, isolated testing without requiring actual Roam API access.
 """
 
+from collections.abc import Iterator
 from typing import Any
 
 import pytest
@@ -597,9 +598,9 @@ class TestRoamSyncIndex:
 
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
-        mock_roam.get_blocks_for_sync.return_value = [
-            {"uid": "b1", "content": "Test", "page_title": "P1", "edit_time": 1000}
-        ]
+        mock_roam.iter_blocks_for_sync.return_value = iter(
+            [[{"uid": "b1", "content": "Test", "page_title": "P1", "edit_time": 1000}]]
+        )
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -617,7 +618,8 @@ class TestRoamSyncIndex:
 
         assert "Full sync completed" in result
         mock_store.drop_all_data.assert_called_once()
-        mock_roam.get_blocks_for_sync.assert_called_once()
+        mock_roam.iter_blocks_for_sync.assert_called_once_with()
+        mock_roam.get_blocks_for_sync.assert_not_called()
 
     def test_sync_index_incremental(self, mocker: MockerFixture) -> None:
         """Test incremental sync when previous sync exists."""
@@ -671,9 +673,9 @@ class TestRoamSyncIndex:
 
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
-        mock_roam.get_blocks_for_sync.return_value = [
-            {"uid": "b1", "content": "Test", "page_title": "P1", "edit_time": 1000}
-        ]
+        mock_roam.iter_blocks_for_sync.return_value = iter(
+            [[{"uid": "b1", "content": "Test", "page_title": "P1", "edit_time": 1000}]]
+        )
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -696,7 +698,7 @@ class TestRoamSyncIndex:
         """Test error handling for API errors."""
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
-        mock_roam.get_blocks_for_sync.side_effect = RoamAPIError("API Error")
+        mock_roam.iter_blocks_for_sync.side_effect = RoamAPIError("API Error")
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -714,7 +716,7 @@ class TestRoamSyncIndex:
         """Test error handling for unexpected errors."""
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
-        mock_roam.get_blocks_for_sync.side_effect = ValueError("Unexpected")
+        mock_roam.iter_blocks_for_sync.side_effect = ValueError("Unexpected")
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -733,9 +735,9 @@ class TestRoamSyncIndex:
 
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
-        mock_roam.get_blocks_for_sync.return_value = [
-            {"uid": "b1", "content": "Test", "page_title": "P1", "edit_time": 1000}
-        ]
+        mock_roam.iter_blocks_for_sync.return_value = iter(
+            [[{"uid": "b1", "content": "Test", "page_title": "P1", "edit_time": 1000}]]
+        )
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -753,7 +755,7 @@ class TestRoamSyncIndex:
         sync_index(full=False)
 
         # Should do full sync since no timestamp
-        mock_roam.get_blocks_for_sync.assert_called_once()
+        mock_roam.iter_blocks_for_sync.assert_called_once_with()
 
     def test_sync_index_multiple_batches_progress_logging(
         self, mocker: MockerFixture
@@ -774,7 +776,7 @@ class TestRoamSyncIndex:
 
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
-        mock_roam.get_blocks_for_sync.return_value = blocks
+        mock_roam.iter_blocks_for_sync.return_value = iter([blocks])
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -806,7 +808,7 @@ class TestRoamSyncIndex:
 
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
-        mock_roam.get_blocks_for_sync.return_value = blocks
+        mock_roam.iter_blocks_for_sync.return_value = iter([blocks])
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -826,6 +828,113 @@ class TestRoamSyncIndex:
         # Should not crash when blocks have no edit_time
         mock_store.set_last_sync_timestamp.assert_not_called()
 
+    def test_sync_index_full_sync_streams_windows(self, mocker: MockerFixture) -> None:
+        """Test that each fetched window is stored before the next is fetched."""
+        import numpy as np
+
+        events: list[str] = []
+
+        def windows() -> Iterator[list[dict[str, Any]]]:
+            events.append("fetch 1")
+            yield [{"uid": "b1", "content": "A", "page_title": "P", "edit_time": 3000}]
+            events.append("fetch 2")
+            yield [{"uid": "b2", "content": "B", "page_title": "P", "edit_time": 2000}]
+            events.append("fetch 3")
+            yield [{"uid": "b3", "content": "C", "page_title": "P"}]
+
+        mock_roam = mocker.MagicMock()
+        mock_roam.graph_name = "test-graph"
+        mock_roam.iter_blocks_for_sync.return_value = windows()
+        mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
+
+        mock_store = mocker.MagicMock()
+        mock_store.get_sync_status.return_value = SyncStatus.COMPLETED
+        mock_store.upsert_embeddings.side_effect = lambda uids, _: events.append(
+            f"store {uids[0]}"
+        )
+        mocker.patch("mcp_server_roam.server.get_vector_store", return_value=mock_store)
+
+        mock_embedding = mocker.MagicMock()
+        mock_embedding.format_block_for_embedding.return_value = "formatted"
+        mock_embedding.embed_texts.return_value = np.array([[0.1] * 384])
+        mocker.patch(
+            "mcp_server_roam.server.get_embedding_service", return_value=mock_embedding
+        )
+
+        result = sync_index(full=True)
+
+        assert "Processed 3 blocks" in result
+        assert events == [
+            "fetch 1",
+            "store b1",
+            "fetch 2",
+            "store b2",
+            "fetch 3",
+            "store b3",
+        ]
+        # The cursor is the latest edit time across all windows
+        mock_store.set_last_sync_timestamp.assert_called_once_with(3000)
+
+    def test_sync_index_counts_cleared_blocks_separately(
+        self, mocker: MockerFixture
+    ) -> None:
+        """Test that blank blocks are processed but not embedded."""
+        import numpy as np
+
+        mock_roam = mocker.MagicMock()
+        mock_roam.graph_name = "test-graph"
+        mock_roam.get_blocks_for_sync.return_value = [
+            {"uid": "b1", "content": "Kept", "page_title": "P", "edit_time": 2000},
+            {"uid": "b2", "content": "", "page_title": "P", "edit_time": 2100},
+            {"uid": "b3", "content": "  ", "page_title": "P", "edit_time": 2200},
+        ]
+        mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
+
+        mock_store = mocker.MagicMock()
+        mock_store.get_sync_status.return_value = SyncStatus.COMPLETED
+        mock_store.get_last_sync_timestamp.return_value = 1000
+        mocker.patch("mcp_server_roam.server.get_vector_store", return_value=mock_store)
+
+        mock_embedding = mocker.MagicMock()
+        mock_embedding.format_block_for_embedding.return_value = "formatted"
+        mock_embedding.embed_texts.return_value = np.array([[0.1] * 384])
+        mocker.patch(
+            "mcp_server_roam.server.get_embedding_service", return_value=mock_embedding
+        )
+
+        result = sync_index(full=False)
+
+        assert "Processed 3 blocks, embedded 1." in result
+        # All rows are stored, but only the non-blank block is embedded and
+        # the cleared blocks lose any stale embedding
+        assert len(mock_store.upsert_blocks.call_args[0][0]) == 3
+        mock_store.upsert_embeddings.assert_called_once()
+        assert mock_store.upsert_embeddings.call_args[0][0] == ["b1"]
+        mock_store.delete_embeddings.assert_called_once_with(["b2", "b3"])
+        mock_store.set_last_sync_timestamp.assert_called_once_with(2200)
+
+    def test_sync_index_full_sync_empty_graph(self, mocker: MockerFixture) -> None:
+        """Test that a full sync of an empty graph completes without embedding."""
+        mock_roam = mocker.MagicMock()
+        mock_roam.graph_name = "test-graph"
+        mock_roam.iter_blocks_for_sync.return_value = iter([])
+        mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
+
+        mock_store = mocker.MagicMock()
+        mock_store.get_sync_status.return_value = SyncStatus.NOT_INITIALIZED
+        mocker.patch("mcp_server_roam.server.get_vector_store", return_value=mock_store)
+
+        mock_embedding = mocker.MagicMock()
+        mocker.patch(
+            "mcp_server_roam.server.get_embedding_service", return_value=mock_embedding
+        )
+
+        result = sync_index(full=True)
+
+        assert "No blocks to sync" in result
+        mock_embedding.embed_texts.assert_not_called()
+        mock_store.set_sync_status.assert_called_with(SyncStatus.COMPLETED)
+
 
 # Tests for semantic_search
 class TestRoamSemanticSearch:
@@ -855,7 +964,7 @@ class TestRoamSemanticSearch:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = ["Parent 1"]
+        mock_roam.get_block_parent_chains.return_value = {"block-1": ["Parent 1"]}
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -885,6 +994,8 @@ class TestRoamSemanticSearch:
         assert "Test Page" in result
         assert "Test content" in result
         assert "block-1" in result
+        assert "Parent 1" in result
+        mock_roam.get_block_parent_chains.assert_called_once_with(["block-1"])
 
     def test_search_no_results(self, mocker: MockerFixture) -> None:
         """Test search returns message when no results found."""
@@ -920,7 +1031,7 @@ class TestRoamSemanticSearch:
         mock_roam.get_blocks_for_sync.return_value = [
             {"uid": "new-block", "content": "New", "page_title": "P", "edit_time": 2000}
         ]
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -963,7 +1074,7 @@ class TestRoamSemanticSearch:
         mock_roam.get_blocks_for_sync.return_value = [
             {"uid": "new-block", "content": "New", "page_title": "P"}
         ]
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -1030,7 +1141,7 @@ class TestRoamSemanticSearch:
         semantic_search("test", include_context=False)
 
         # Should not fetch parent chain
-        mock_roam.get_block_parent_chain.assert_not_called()
+        mock_roam.get_block_parent_chains.assert_not_called()
 
     def test_search_api_error(self, mocker: MockerFixture) -> None:
         """Test search handles API errors gracefully."""
@@ -1073,7 +1184,7 @@ class TestRoamSemanticSearch:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         long_content = "A" * 600
@@ -1110,7 +1221,7 @@ class TestRoamSemanticSearch:
 
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -1149,7 +1260,7 @@ class TestRoamSemanticSearch:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         # Use a very recent timestamp (now)
@@ -1212,7 +1323,7 @@ class TestRoamSemanticSearch:
         result = semantic_search("test", include_context=True)
 
         # Should not fetch parent chain since it already exists
-        mock_roam.get_block_parent_chain.assert_not_called()
+        mock_roam.get_block_parent_chains.assert_not_called()
         assert "Already > Exists" in result
 
 
@@ -1910,7 +2021,7 @@ class TestSemanticSearchEnrichments:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mock_roam.get_block_children_preview.return_value = [
             {"uid": "child1", "content": "Child block 1"},
             {"uid": "child2", "content": "Child block 2"},
@@ -1952,7 +2063,7 @@ class TestSemanticSearchEnrichments:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         # Create a child with content > 150 chars
         long_content = "A" * 200  # 200 characters
         mock_roam.get_block_children_preview.return_value = [
@@ -1994,7 +2105,7 @@ class TestSemanticSearchEnrichments:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mock_roam.get_block_reference_count.return_value = 5
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
@@ -2032,7 +2143,7 @@ class TestSemanticSearchEnrichments:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mock_roam.get_block_siblings.return_value = {
             "before": [{"uid": "sib1", "content": "Previous sibling"}],
             "after": [{"uid": "sib2", "content": "Next sibling"}],
@@ -2076,7 +2187,7 @@ class TestSemanticSearchEnrichments:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         # Siblings exist but both before and after are empty
         mock_roam.get_block_siblings.return_value = {
             "before": [],
@@ -2119,7 +2230,7 @@ class TestSemanticSearchEnrichments:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         mock_store = mocker.MagicMock()
@@ -2157,7 +2268,7 @@ class TestSemanticSearchEnrichments:
         mock_roam = mocker.MagicMock()
         mock_roam.graph_name = "test-graph"
         mock_roam.get_blocks_for_sync.return_value = []
-        mock_roam.get_block_parent_chain.return_value = []
+        mock_roam.get_block_parent_chains.return_value = {"block-1": []}
         mocker.patch(ROAM_CLIENT_PATH, return_value=mock_roam)
 
         # Use a specific timestamp: Jan 15, 2025
@@ -242,6 +242,29 @@ class TestEmbeddingOperations:
         )
         assert cursor.fetchone()["embedded_at"] is not None
 
+    def test_delete_embeddings(self, vector_store: VectorStore) -> None:
+        """Test that deleting embeddings removes them and clears embedded_at."""
+        vector_store.upsert_blocks(
+            [
+                {"uid": "block-1", "content": "Content 1"},
+                {"uid": "block-2", "content": "Content 2"},
+            ]
+        )
+        embeddings = np.array(
+            [[0.1] * EMBEDDING_DIMENSIONS, [0.2] * EMBEDDING_DIMENSIONS],
+            dtype=np.float32,
+        )
+        vector_store.upsert_embeddings(["block-1", "block-2"], embeddings)
+
+        assert vector_store.delete_embeddings(["block-1", "missing"]) == 1
+        assert vector_store.delete_embeddings([]) == 0
+
+        assert vector_store.get_embedding_count() == 1
+        cursor = vector_store.conn.execute(
+            "SELECT embedded_at FROM blocks WHERE uid = 'block-1'"
+        )
+        assert cursor.fetchone()["embedded_at"] is None
+
 
 class TestSearch:
     """Tests for vector similarity search."""